@@ -0,0 +1,171 @@
+# app/ai/extraction.py
+#
+# One round trip to the LLM per command. The model is asked for every slot
+# the bot can act on (intent, coords, direction, dungeon, level, event) in a
+# single request constrained to a JSON schema by Ollama's structured output,
+# so the answer parses as JSON without regex repair. It is streamed and the
+# request closed as soon as the object is complete, then validated into a
+# CommandExtraction; anything out of range becomes None.
+# The schema requires every slot, so a parsed answer has settled all of
+# them: a null slot means the player didn't say it. The answer is handed on
+# to the panic handlers instead of being asked for again.
+
+import json
+import re
+from dataclasses import asdict, dataclass
+
+from app.ai.llm_cache import MISS, llm_cache
+from app.ai.llm_client import llm_client
+from app.config import DUNGEON_ALIASES, FLATTENED_DUNGEONS, ORDINAL_LEVELS
+from app.utils.helpers import extract_coords, validate_coords
+from app.utils.vocab_index import dungeon_index
+
+# `extraction` argument of a handler nobody has asked the model for yet
+NOT_ASKED = object()
+
+# Bump when the prompt or schema changes so cached answers to the old one are ignored
+EXTRACTION_PROMPT_VERSION = 2
+
+INTENTS = ["coord_panic", "dungeon_panic", "red_alert", "stop_panic", "greet",
+           "announce_event", "cancel_event", "start_event", "unknown"]
+DIRECTIONS = ["north", "northeast", "east", "southeast", "south", "southwest", "west", "northwest"]
+
+
+def nullable(schema: dict) -> dict:
+    return {"anyOf": [schema, {"type": "null"}]}
+
+
+EXTRACTION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "intent": {"type": "string", "enum": INTENTS},
+        "coords": nullable({"type": "string"}),
+        "direction": nullable({"type": "string", "enum": DIRECTIONS}),
+        "dungeon": nullable({"type": "string", "enum": list(DUNGEON_ALIASES)}),
+        "level": nullable({"type": "integer", "minimum": 1, "maximum": 8}),
+        "event_name": nullable({"type": "string"}),
+        "time_until_start": nullable({"type": "string"}),
+    },
+    "required": ["intent", "coords", "direction", "dungeon", "level", "event_name", "time_until_start"],
+}
+
+
+def canonical_dungeon(raw: str) -> str | None:
+    raw = raw.lower().strip()
+    for canonical in DUNGEON_ALIASES:
+        if raw == canonical.lower():
+            return canonical
+    if raw in dungeon_index:
+        return dungeon_index.lookup(raw)
+    close = dungeon_index.best_match(raw, 0.8)
+    return FLATTENED_DUNGEONS.get(close) if close else None
+
+
+def canonical_level(raw) -> str | None:
+    raw = str(raw).lower().strip()
+    raw = ORDINAL_LEVELS.get(raw, raw)
+    match = re.fullmatch(r"(?:level\s*)?([1-8])", raw)
+    return match.group(1) if match else None
+
+
+def clean_text(raw) -> str | None:
+    if not isinstance(raw, (str, int, float)) or isinstance(raw, bool):
+        return None
+    raw = str(raw).strip()
+    return raw or None
+
+
+@dataclass
+class CommandExtraction:
+    """Every slot the bot can act on, validated from the model's JSON answer."""
+
+    intent: str = "unknown"
+    coords: str | None = None
+    direction: str | None = None
+    dungeon: str | None = None
+    level: str | None = None
+    event_name: str | None = None
+    time_until_start: str | None = None
+
+    @classmethod
+    def from_json(cls, raw: str) -> "CommandExtraction | None":
+        try:
+            data = json.loads(raw)
+        except json.JSONDecodeError:
+            return None
+        return cls.from_dict(data) if isinstance(data, dict) else None
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CommandExtraction":
+        intent = data.get("intent")
+        coords = clean_text(data.get("coords"))
+        coords = extract_coords(coords) if coords else None
+        direction = (clean_text(data.get("direction")) or "").lower()
+        dungeon = clean_text(data.get("dungeon"))
+        level = clean_text(data.get("level"))
+        return cls(
+            intent=intent if intent in INTENTS else "unknown",
+            coords=coords if coords and validate_coords(coords) else None,
+            direction=direction if direction in DIRECTIONS else None,
+            dungeon=canonical_dungeon(dungeon) if dungeon else None,
+            level=canonical_level(level) if level else None,
+            event_name=clean_text(data.get("event_name")),
+            time_until_start=clean_text(data.get("time_until_start")),
+        )
+
+    def as_dict(self) -> dict:
+        """The filled slots, in the shape detect_high_level_intent returns."""
+        return {slot: value for slot, value in asdict(self).items() if value is not None}
+
+
+async def extract_command(text: str) -> CommandExtraction | None:
+    """All slots of `text` from one schema-constrained LLM call.
+
+    Returns None if the model timed out, failed or answered something that
+    isn't a JSON object; callers then keep their rule-based result.
+    """
+    cached = llm_cache.get("command", EXTRACTION_PROMPT_VERSION, text)
+    if cached is not MISS:
+        return CommandExtraction(**cached)
+
+    prompt = f"""
+You are Jarvis, a voice assistant for the game Ultima Online: Outlands.
+
+Analyze the player's speech and fill in every field of the JSON object. Use null for anything the player didn't say.
+
+- "intent": one of {", ".join(INTENTS)}
+- "coords": two numbers like "3200 2100" if the player gave a location
+- "direction": the direction they are moving, if mentioned
+- "dungeon": one of {", ".join(DUNGEON_ALIASES)}
+- "level": the dungeon level 1-8 (may be said like "third" or "level three")
+- "event_name": short name of an announced event (e.g., "Ocean Boss", "Corpse Creek")
+- "time_until_start": how long until the event starts (e.g., "10 minutes")
+
+Examples:
+
+"Jarvis, help! We're under attack at 3220 2140 moving east"
+→ {{"intent": "coord_panic", "coords": "3220 2140", "direction": "east", "dungeon": null, "level": null, "event_name": null, "time_until_start": null}}
+
+"Red alert in Pulma level three"
+→ {{"intent": "red_alert", "coords": null, "direction": null, "dungeon": "Pulma", "level": 3, "event_name": null, "time_until_start": null}}
+
+"Jarvis announce Ocean Boss happening in 10 minutes"
+→ {{"intent": "announce_event", "coords": null, "direction": null, "dungeon": null, "level": null, "event_name": "Ocean Boss", "time_until_start": "10 minutes"}}
+
+Transcript: "{text.strip()}"
+JSON:
+"""
+
+    raw = await llm_client.chat(prompt, format=EXTRACTION_SCHEMA, stream=True)
+    if raw is None:
+        return None
+    print(f"[LLM Extract] 📦 Raw: {raw}")
+
+    extraction = CommandExtraction.from_json(raw)
+    if extraction is None:
+        print("⚠️ LLM extraction returned something other than a JSON object")
+        return None
+    # An answer with nothing in it isn't cached; the same phrase gets a fresh attempt next time
+    if extraction.as_dict() != {"intent": "unknown"}:
+        llm_cache.put("command", EXTRACTION_PROMPT_VERSION, text, asdict(extraction))
+    return extraction
@@ -0,0 +1,113 @@
+# app/ai/llm_cache.py
+#
+# Result cache for the LLM fallbacks. Players repeat the same phrases all the
+# time, so an extraction is looked up by (kind, prompt version, normalized
+# transcript) before any round trip to Ollama. Entries expire after a TTL,
+# the least recently used are evicted past a size limit, and the cache is
+# saved to JSON so it survives restarts.
+
+import json
+import os
+import re
+import time
+from collections import OrderedDict
+
+from app.config import LLM_CACHE_PATH, LLM_CACHE_SIZE, LLM_CACHE_TTL_SECONDS
+
+MISS = object()
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", text.lower()).split())
+
+
+class LLMCache:
+    """TTL + LRU cache of LLM extraction results, persisted as JSON.
+
+    Only useful answers the model actually gave should be stored. A failed
+    call (Ollama down, timeout) or a negative answer ("unknown", nothing
+    found) must not be cached, or one bad generation would pin that phrase
+    for the whole TTL. Lookups return `MISS` when there is no entry.
+    """
+
+    def __init__(self, path: str, max_entries: int = 1024, ttl_seconds: float = 7 * 24 * 3600,
+                 save_interval: float = 30.0):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self.save_interval = save_interval
+        self._entries = OrderedDict()     # key -> (stored_at, value), least recently used first
+        self._loaded = False
+        self._dirty = False
+        self._last_save = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(kind: str, version: int, text: str) -> str:
+        return f"{kind}:v{version}:{normalize_text(text)}"
+
+    def _load(self):
+        self._loaded = True
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                stored = json.load(f)
+        except Exception as e:
+            print(f"[LLM Cache] ⚠️ Ignoring unreadable cache {self.path}: {e}")
+            return
+        now = time.time()
+        for key, stored_at, value in stored:
+            if now - stored_at < self.ttl:
+                self._entries[key] = (stored_at, value)
+        print(f"[LLM Cache] 📂 Loaded {len(self._entries)} entries from {self.path}")
+
+    def get(self, kind: str, version: int, text: str):
+        if not self._loaded:
+            self._load()
+        key = self.key(kind, version, text)
+        entry = self._entries.get(key)
+        if entry is not None and time.time() - entry[0] >= self.ttl:
+            del self._entries[key]
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return MISS
+        self._entries.move_to_end(key)
+        self.hits += 1
+        print(f"[LLM Cache] ⚡ Hit for {kind} ({self.summary()})")
+        return entry[1]
+
+    def put(self, kind: str, version: int, text: str, value):
+        if not self._loaded:
+            self._load()
+        key = self.key(kind, version, text)
+        self._entries[key] = (time.time(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        self._dirty = True
+        if time.time() - self._last_save >= self.save_interval:
+            self.save()
+
+    def save(self):
+        if not self._dirty or not self.path:
+            return
+        temp_path = f"{self.path}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump([[key, stored_at, value] for key, (stored_at, value) in self._entries.items()], f)
+            os.replace(temp_path, self.path)
+            self._dirty = False
+            self._last_save = time.time()
+        except Exception as e:
+            print(f"[LLM Cache] ⚠️ Failed to save {self.path}: {e}")
+
+    def summary(self) -> str:
+        total = self.hits + self.misses
+        rate = self.hits / total if total else 0.0
+        return f"{self.hits} hits / {self.misses} misses, {rate:.0%} hit rate, {len(self._entries)} entries"
+
+
+llm_cache = LLMCache(LLM_CACHE_PATH, LLM_CACHE_SIZE, LLM_CACHE_TTL_SECONDS)
@@ -0,0 +1,161 @@
+# app/ai/llm_client.py
+#
+# The one way the bot talks to Ollama. A single AsyncClient keeps its HTTP
+# connections alive between calls, a semaphore caps how many requests can
+# pile onto the local model at once, identical concurrent prompts share one
+# call, and every call has a deadline. Callers get None back on timeout or
+# error and fall back to their rule-based result. JSON answers can be
+# streamed and cut off as soon as the object is complete, and a request
+# nobody is waiting for any more is cancelled.
+
+import asyncio
+import json
+from contextvars import ContextVar
+
+import ollama
+
+from app.config import LLM_MAX_CONCURRENT, LLM_MODEL, LLM_TIMEOUT_SECONDS, OLLAMA_HOST
+
+
+class JSONObjectScanner:
+    """Finds the end of the first top-level JSON object in streamed text."""
+
+    def __init__(self):
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+
+    def feed(self, chunk: str) -> int | None:
+        """Index just past the object's closing brace in `chunk`, or None if it hasn't closed yet."""
+        for i, char in enumerate(chunk):
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = self.depth > 0
+            elif char == "{":
+                self.depth += 1
+            elif char == "}" and self.depth:
+                self.depth -= 1
+                if not self.depth:
+                    return i + 1
+        return None
+
+
+class LLMClient:
+    def __init__(self, model: str, host: str | None = None, max_concurrent: int = 2, timeout: float = 4.0):
+        self.model = model
+        self.host = host
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._client = None
+        self._inflight = {}
+        self._waiters = {}
+        self._round_trips = ContextVar("llm_round_trips", default=None)
+        self.calls = 0
+        self.collapsed = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.cancelled = 0
+        self.early_exits = 0
+
+    @property
+    def client(self) -> ollama.AsyncClient:
+        # Created on first use so it binds to the running event loop
+        if self._client is None:
+            self._client = ollama.AsyncClient(host=self.host)
+        return self._client
+
+    async def chat(self, prompt: str, timeout: float | None = None, format: str | dict | None = None,
+                   stream: bool = False) -> str | None:
+        """Message content for `prompt`, or None if the model failed or missed the deadline.
+
+        The deadline covers waiting for a free slot as well as generation.
+        Concurrent callers with the same prompt await the same call, and the
+        call is cancelled if every caller is.
+        `format` is passed to Ollama: "json" or a JSON schema the answer must follow.
+        With `stream`, the answer is read as it is generated and the request is
+        closed as soon as a complete JSON object has arrived.
+        """
+        key = (prompt, json.dumps(format, sort_keys=True), stream)
+        task = self._inflight.get(key)
+        if task is not None:
+            self.collapsed += 1
+        else:
+            task = asyncio.create_task(self._call(prompt, timeout or self.timeout, format, stream))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            self._waiters[key] -= 1
+            if not self._waiters[key]:
+                del self._waiters[key]
+                if not task.done():
+                    # 🛑 Nobody wants the answer any more, free the slot
+                    task.cancel()
+                    self.cancelled += 1
+
+    def count_round_trips(self) -> list:
+        """Count the requests the current task (and tasks it starts) sends to Ollama.
+
+        Returns a one-element list holding the running count; read it once the
+        command has been handled.
+        """
+        counter = [0]
+        self._round_trips.set(counter)
+        return counter
+
+    async def _call(self, prompt: str, timeout: float, format: str | dict | None = None,
+                    stream: bool = False) -> str | None:
+        try:
+            return await asyncio.wait_for(self._request(prompt, format, stream), timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            print(f"[LLM] ⏱️ No answer within {timeout:.1f}s, using rule-based result ({self.summary()})")
+        except Exception as e:
+            self.errors += 1
+            print(f"[LLM] ⚠️ Request failed: {e}")
+        return None
+
+    async def _request(self, prompt: str, format: str | dict | None = None, stream: bool = False) -> str:
+        async with self._semaphore:
+            self.calls += 1
+            counter = self._round_trips.get()
+            if counter is not None:
+                counter[0] += 1
+            messages = [{"role": "user", "content": prompt}]
+            if not stream:
+                response = await self.client.chat(model=self.model, messages=messages, format=format or "")
+                return response["message"]["content"]
+
+            parts = []
+            scanner = JSONObjectScanner()
+            chunks = await self.client.chat(model=self.model, messages=messages, format=format or "", stream=True)
+            try:
+                async for chunk in chunks:
+                    content = chunk["message"]["content"]
+                    end = scanner.feed(content)
+                    if end is not None:
+                        # ⚡ The object is complete, the rest of the generation is noise
+                        parts.append(content[:end])
+                        self.early_exits += 1
+                        break
+                    parts.append(content)
+            finally:
+                await chunks.aclose()
+            return "".join(parts)
+
+    def summary(self) -> str:
+        return (f"{self.calls} calls, {self.collapsed} collapsed, {self.timeouts} timeouts, "
+                f"{self.errors} errors, {self.cancelled} cancelled, {self.early_exits} early exits, "
+                f"{len(self._inflight)} in flight")
+
+
+llm_client = LLMClient(LLM_MODEL, OLLAMA_HOST, LLM_MAX_CONCURRENT, LLM_TIMEOUT_SECONDS)
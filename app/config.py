@@ -32,4 +32,87 @@ COMMON_MISHEARINGS = {
 }
 
 # Flatten alias list for reverse lookup
-FLATTENED_DUNGEONS = {alias: canon for canon, aliases in DUNGEON_ALIASES.items() for alias in aliases}
\ No newline at end of file
+FLATTENED_DUNGEONS = {alias: canon for canon, aliases in DUNGEON_ALIASES.items() for alias in aliases}
+
+# Per-speaker audio buffering
+MAX_BUFFER_SECONDS = 30           # oldest audio is overwritten past this
+AUDIO_MEMORY_BUDGET_MB = 256      # across all speakers; idle speakers are evicted first
+MODEL_SAMPLE_RATE = 16000         # buffers hold mono float32 at Whisper's native rate
+
+
+# Text-to-speech
+TTS_CACHE_SIZE = 64
+PRERENDERED_PHRASES = [
+    "Hi, I'm Jarvis. How may I help you?",
+    "Repeat the coordinates?",
+    "Please repeat the coordinates.",
+    "Where is the Ocean Boss?",
+    "What dungeon and level?",
+    "I couldn't understand the dungeon and level. Please repeat.",
+    "I didn't understand the event announcement.",
+    "There is no event to cancel.",
+    "There is no event to start.",
+]
+
+
+# Outbound WebSocket replies
+WS_OUTBOUND_QUEUE_SIZE = 16
+WS_SLOW_CLIENT_POLICY = "drop_oldest"   # or "disconnect"
+WS_SEND_TIMEOUT = 5.0
+
+
+# Whisper inference
+WHISPER_INFERENCE_WORKERS = 2     # parallel transcriptions (also CTranslate2 num_workers)
+WHISPER_BATCH_WINDOW_MS = 30      # utterances arriving this close together are decoded as one batch
+WHISPER_MAX_BATCH = 8
+WHISPER_DEVICE = "auto"           # "auto", "cuda" or "cpu"
+WHISPER_GPU_COMPUTE_TYPE = "float16"
+WHISPER_CPU_COMPUTE_TYPE = "int8" # or "int8_float32" on CPUs without fast int8 GEMM
+WHISPER_CPU_THREADS = 0           # intra-op threads per worker on CPU (0 = CTranslate2 default)
+WHISPER_DEFAULT_MODEL = "base.en"
+WHISPER_RESIDENT_MODELS = ["tiny.en", "base.en", "small.en"]   # kept loaded so switching between them is instant
+WHISPER_MODEL_LADDER = ["small.en", "base.en", "tiny.en"]        # most accurate first; the selector steps right under load
+WHISPER_P95_TARGET_MS = 1500      # end-to-end transcription latency players should see at p95
+WHISPER_MAX_QUEUE_DEPTH = 4       # this many queued jobs counts as over SLO regardless of latency
+WHISPER_CASCADE_FAST_MODEL = "tiny.en"   # first-pass model for finalized utterances (None disables the cascade)
+WHISPER_CASCADE_MIN_LOGPROB = -0.5       # below this the utterance is re-decoded with the active model
+WHISPER_MODEL_BUDGET_MB = 2048    # upper bound on resident model memory
+
+
+# Wake-word spotter
+WAKE_TEMPLATE_DIR = "wake_templates"   # 16 kHz mono WAV clips of people saying "Jarvis"
+WAKE_SPOTTER_THRESHOLD = 0.6           # mean cosine distance; lower is stricter (tune with bench_wake_spotter.py)
+WAKE_REFRACTORY_SECONDS = 1.0
+WAKE_PREROLL_SECONDS = 0.3             # audio kept before the spotted wake word
+
+
+# Endpointing
+ENDPOINTING = "vad"                    # "vad", or "legacy" for the old byte-count/timeout rules
+SILERO_VAD_MODEL = "models/silero_vad.onnx"
+VAD_HANGOVER_SECONDS = 0.6             # silence after speech before an utterance is final
+VAD_MAX_UTTERANCE_SECONDS = 12.0       # finalize anyway if someone never stops talking
+MIN_UTTERANCE_SECONDS = 0.5
+MONITOR_INTERVAL = 0.1                 # seconds between endpointing checks
+
+# Audio conditioning before final decodes
+CONDITION_SILENCE_DB = -35.0           # frames this far below the loudest frame are silence
+CONDITION_PAD_SECONDS = 0.15           # context kept either side of speech
+CONDITION_MAX_PAUSE_SECONDS = 0.3      # longer pauses inside an utterance are shortened to this
+CONDITION_TARGET_PEAK = 0.9
+CONDITION_MAX_GAIN = 10.0              # don't boost quiet noise by more than 20 dB
+
+# Streaming transcription (runs while a wake-worded utterance is in progress)
+STREAM_STEP_SECONDS = 1.0              # time between incremental passes per speaker
+STREAM_MIN_SECONDS = 1.0               # don't run a pass on less uncommitted audio than this
+
+
+# LLM fallbacks (Ollama)
+LLM_MODEL = "mistral:7b-instruct"
+OLLAMA_HOST = None                     # None = OLLAMA_HOST env var or http://localhost:11434
+LLM_MAX_CONCURRENT = 2                 # requests allowed onto the local model at once
+LLM_TIMEOUT_SECONDS = 4.0              # per call, including the wait for a free slot
+
+# LLM fallback result cache
+LLM_CACHE_PATH = "llm_cache.json"
+LLM_CACHE_SIZE = 1024                  # entries; least recently used are evicted first
+LLM_CACHE_TTL_SECONDS = 7 * 24 * 3600
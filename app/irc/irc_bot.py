@@ -107,10 +107,10 @@ async def handle_incoming_irc():
             command = force_model_match.group(2)
 
             if command == "forcebase":
-                force_use_base_model()
+                await force_use_base_model()
                 await send_irc_message(f"🛠️ {requester} manually forced Whisper model: base.en")
             elif command == "forcesmall":
-                force_use_small_model()
+                await force_use_small_model()
                 await send_irc_message(f"🛠️ {requester} manually forced Whisper model: small.en")
 
 async def send_irc_message(message: str):
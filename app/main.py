@@ -4,8 +4,12 @@ import subprocess
 import signal
 import os
 
+from app.ai.llm_cache import llm_cache
+from app.config import PRERENDERED_PHRASES
+from app.transcribe.model_manager import model_manager
 from app.transcribe.transcriber import start_transcriber_loop
-from app.websocket import start_ws_server
+from app.transcribe.whisper_modal import model_selector
+from app.websocket import start_ws_server, tts_worker
 from app.irc.irc_bot import connect_irc, writer as irc_writer  # 👈
 from app.websocket import ws_clients 
 from app.discord_module.discord_bot import start_discord_bot, stop_discord_bot
@@ -30,7 +34,7 @@ async def shutdown():
         print("🌐 WebSocket server stopped")
     try:
         print("📨 Sending shutdown to Node.js client...")
-        for ws in ws_clients.copy():
+        for ws in list(ws_clients):
             await ws.send(json.dumps({"type": "shutdown"}))
     except Exception as e:
         print(f"⚠️ WebSocket client shutdown failed: {e}")
@@ -45,6 +49,9 @@ async def shutdown():
         except Exception as e:
             print(f"⚠️ IRC disconnect error: {e}")
 
+    tts_worker.shutdown()
+    llm_cache.save()
+
     if node_process and node_process.poll() is None:
         print("🧼 Terminating Node.js subprocess...")
         node_process.terminate()
@@ -65,6 +72,9 @@ async def main():
             signal.signal(sig, lambda s, f: asyncio.create_task(shutdown()))
     except NotImplementedError:
         print("⚠️ Signal handling not supported on this platform (Windows). Ctrl+C may not work cleanly.")
+    asyncio.create_task(tts_worker.prerender(PRERENDERED_PHRASES))
+    asyncio.create_task(model_manager.preload_async())  # warm Whisper in the background
+    asyncio.create_task(model_selector.run())
     ws_server = await start_ws_server()
     await connect_irc()
     await start_transcriber_loop()  # ✅ now the transcription monitor loop starts too
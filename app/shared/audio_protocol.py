@@ -0,0 +1,91 @@
+# app/shared/audio_protocol.py
+#
+# Binary framing used between the Node listener and the Python side.
+#
+# Every binary WebSocket message starts with a message header, followed by
+# `frame_count` frames:
+#
+#   message header  !BBBB   version, kind, sample_format, frame_count
+#   frame header    !BII    speaker_len, seq, payload_len
+#                   speaker_len bytes of UTF-8 speaker id
+#                   payload_len bytes of payload (raw PCM for KIND_AUDIO,
+#                   an Ogg Opus file for KIND_SPEAK)
+#
+# KIND_AUDIO flows Node -> Python, KIND_SPEAK carries Jarvis replies back.
+# Clients that do not negotiate AUDIO_SUBPROTOCOL keep using the legacy JSON
+# form ({"user": ..., "audio": <base64>}) in both directions.
+
+import struct
+
+PROTOCOL_VERSION = 1
+AUDIO_SUBPROTOCOL = "ggv-audio.v1"
+JSON_SUBPROTOCOL = "ggv-json"
+
+KIND_AUDIO = 1
+KIND_SPEAK = 2
+
+FORMAT_PCM_S16LE_48K_MONO = 1
+FORMAT_OGG_OPUS = 2
+
+# sample_format -> (sample_rate, bytes per sample, channels)
+SAMPLE_FORMATS = {
+    FORMAT_PCM_S16LE_48K_MONO: (48000, 2, 1),
+}
+
+MESSAGE_HEADER = struct.Struct("!BBBB")
+FRAME_HEADER = struct.Struct("!BII")
+
+MAX_FRAMES_PER_MESSAGE = 255
+
+
+class ProtocolError(ValueError):
+    pass
+
+
+def decode_message(data):
+    """Yield (speaker, seq, sample_format, payload) for each frame of a binary message.
+
+    Payloads are memoryviews into `data`, so nothing is copied until the
+    caller stores them.
+    """
+    view = memoryview(data)
+    if len(view) < MESSAGE_HEADER.size:
+        raise ProtocolError("message shorter than header")
+
+    version, kind, sample_format, frame_count = MESSAGE_HEADER.unpack_from(view, 0)
+    if version != PROTOCOL_VERSION:
+        raise ProtocolError(f"unsupported protocol version {version}")
+    if kind != KIND_AUDIO:
+        raise ProtocolError(f"unexpected message kind {kind}")
+    if sample_format not in SAMPLE_FORMATS:
+        raise ProtocolError(f"unknown sample format {sample_format}")
+
+    offset = MESSAGE_HEADER.size
+    for _ in range(frame_count):
+        if offset + FRAME_HEADER.size > len(view):
+            raise ProtocolError("truncated frame header")
+        speaker_len, seq, payload_len = FRAME_HEADER.unpack_from(view, offset)
+        offset += FRAME_HEADER.size
+
+        end = offset + speaker_len + payload_len
+        if end > len(view):
+            raise ProtocolError("truncated frame body")
+        speaker = bytes(view[offset:offset + speaker_len]).decode("utf-8")
+        payload = view[offset + speaker_len:end]
+        offset = end
+
+        yield speaker, seq, sample_format, payload
+
+
+def encode_message(frames, kind=KIND_AUDIO, sample_format=FORMAT_PCM_S16LE_48K_MONO) -> bytes:
+    """Pack [(speaker, seq, payload), ...] into one binary message."""
+    if len(frames) > MAX_FRAMES_PER_MESSAGE:
+        raise ProtocolError(f"too many frames ({len(frames)}) for one message")
+
+    parts = [MESSAGE_HEADER.pack(PROTOCOL_VERSION, kind, sample_format, len(frames))]
+    for speaker, seq, payload in frames:
+        speaker_bytes = speaker.encode("utf-8")
+        parts.append(FRAME_HEADER.pack(len(speaker_bytes), seq & 0xFFFFFFFF, len(payload)))
+        parts.append(speaker_bytes)
+        parts.append(payload)
+    return b"".join(parts)
@@ -0,0 +1,33 @@
+# app/shared/metrics.py
+
+from collections import deque
+
+
+class RollingStats:
+    """Keeps the last `window` samples of a measurement for percentile reporting."""
+
+    def __init__(self, window: int = 200):
+        self.samples = deque(maxlen=window)
+        self.total = 0
+
+    def add(self, value: float):
+        self.samples.append(value)
+        self.total += 1
+
+    def percentile(self, pct: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    @property
+    def p50(self) -> float:
+        return self.percentile(50)
+
+    @property
+    def p95(self) -> float:
+        return self.percentile(95)
+
+    def summary(self, unit: str = "ms") -> str:
+        return f"p50 {self.p50:.0f}{unit} p95 {self.p95:.0f}{unit} (n={len(self.samples)})"
@@ -0,0 +1,74 @@
+# app/shared/outbound_queue.py
+
+import asyncio
+
+DROP_OLDEST = "drop_oldest"
+DISCONNECT = "disconnect"
+
+
+class ClientWriter:
+    """Bounded outbound queue plus a dedicated writer task for one WebSocket client.
+
+    Producers call `enqueue` and never wait on the socket. When the queue is
+    full, the client is either trimmed (drop-oldest) or disconnected,
+    depending on `policy`. A client that is disconnected, or whose socket
+    fails, is closed and `on_close` is called so the owner can forget it.
+    """
+
+    def __init__(self, websocket, maxsize: int = 16, policy: str = DROP_OLDEST, send_timeout: float = 5.0,
+                 on_close=None):
+        if policy not in (DROP_OLDEST, DISCONNECT):
+            raise ValueError(f"unknown slow-client policy: {policy}")
+        self.websocket = websocket
+        self.policy = policy
+        self.send_timeout = send_timeout
+        self.on_close = on_close
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.sent = 0
+        self.dropped = 0
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    def enqueue(self, message) -> bool:
+        if self._task is None or self._task.done():
+            return False
+
+        if self.queue.full():
+            if self.policy == DISCONNECT:
+                print(f"⚠️ Outbound queue full for {self.websocket.remote_address}, disconnecting slow client")
+                self._disconnect()
+                return False
+            self.queue.get_nowait()
+            self.dropped += 1
+            print(f"⚠️ Outbound queue full for {self.websocket.remote_address}, dropped oldest message")
+
+        self.queue.put_nowait(message)
+        return True
+
+    async def _run(self):
+        while True:
+            message = await self.queue.get()
+            try:
+                await asyncio.wait_for(self.websocket.send(message), self.send_timeout)
+                self.sent += 1
+            except asyncio.TimeoutError:
+                print(f"⚠️ Send to {self.websocket.remote_address} timed out, disconnecting")
+                self._disconnect()
+                return
+            except Exception as e:
+                print(f"⚠️ Send to {self.websocket.remote_address} failed: {e}, disconnecting")
+                self._disconnect()
+                return
+
+    def _disconnect(self):
+        asyncio.create_task(self.websocket.close())
+        self.close()
+        if self.on_close:
+            self.on_close()
+
+    def close(self):
+        if self._task and not self._task.done():
+            self._task.cancel()
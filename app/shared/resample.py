@@ -0,0 +1,43 @@
+# app/shared/resample.py
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def lowpass_taps(factor: int, num_taps: int = 63) -> np.ndarray:
+    """Blackman-windowed sinc low-pass with its cutoff just below the new Nyquist."""
+    cutoff = 0.9 / (2 * factor)  # cycles per input sample
+    n = np.arange(num_taps) - (num_taps - 1) / 2
+    taps = 2 * cutoff * np.sinc(2 * cutoff * n) * np.blackman(num_taps)
+    return (taps / taps.sum()).astype(np.float32)
+
+
+class Decimator:
+    """Streaming int16 -> float32 decimator (48 kHz -> 16 kHz by default).
+
+    Each call filters one block in a single vectorized pass and only evaluates
+    the output samples that are kept. Filter history and output phase carry
+    over between blocks, so chunk boundaries are seamless.
+    """
+
+    def __init__(self, in_rate: int = 48000, out_rate: int = 16000, num_taps: int = 63):
+        if in_rate % out_rate:
+            raise ValueError(f"{in_rate} Hz is not an integer multiple of {out_rate} Hz")
+        self.factor = in_rate // out_rate
+        self._taps = lowpass_taps(self.factor, num_taps)[::-1].copy()
+        self._history = np.zeros(num_taps - 1, dtype=np.float32)
+        self._phase = 0
+
+    def process(self, pcm) -> np.ndarray:
+        block = np.frombuffer(pcm, dtype=np.int16).astype(np.float32)
+        block *= 1.0 / 32768.0
+        if len(block) == 0:
+            return block
+
+        extended = np.concatenate((self._history, block))
+        windows = sliding_window_view(extended, len(self._taps))[self._phase::self.factor]
+        out = windows @ self._taps
+
+        self._history = extended[-(len(self._taps) - 1):].copy()
+        self._phase = (self._phase - len(block)) % self.factor
+        return out
@@ -0,0 +1,80 @@
+# app/shared/ring_buffer.py
+
+import numpy as np
+
+
+class AudioRingBuffer:
+    """Fixed-size per-speaker audio store.
+
+    The backing array is allocated once at twice the capacity and every sample
+    is mirrored into both halves, so any window of up to `capacity` samples is
+    contiguous and can be returned as a NumPy view instead of a copy.
+    """
+
+    def __init__(self, max_seconds: float, sample_rate: int = 48000, dtype=np.int16):
+        self.sample_rate = sample_rate
+        self.dtype = np.dtype(dtype)
+        self.capacity = int(max_seconds * sample_rate)
+        self._data = np.zeros(self.capacity * 2, dtype=self.dtype)
+        self._pos = 0          # next write index in [0, capacity)
+        self.fill = 0          # samples currently held
+        self.written = 0       # samples ever written
+        self.overflowed = 0    # samples overwritten before anyone popped them
+
+    @staticmethod
+    def bytes_for(max_seconds: float, sample_rate: int = 48000, dtype=np.int16) -> int:
+        return int(max_seconds * sample_rate) * 2 * np.dtype(dtype).itemsize
+
+    @property
+    def nbytes(self) -> int:
+        return self._data.nbytes
+
+    @property
+    def duration(self) -> float:
+        return self.fill / self.sample_rate
+
+    def __len__(self):
+        return self.fill
+
+    def write(self, chunk):
+        samples = chunk if isinstance(chunk, np.ndarray) else np.frombuffer(chunk, dtype=self.dtype)
+        n = len(samples)
+        if n == 0:
+            return
+
+        if n >= self.capacity:
+            samples = samples[-self.capacity:]
+        self.overflowed += max(0, self.fill + n - self.capacity)
+        self.fill = min(self.capacity, self.fill + n)
+        self.written += n
+
+        cap = self.capacity
+        remaining = samples
+        while len(remaining):
+            count = min(len(remaining), cap - self._pos)
+            block = remaining[:count]
+            self._data[self._pos:self._pos + count] = block
+            self._data[self._pos + cap:self._pos + cap + count] = block
+            self._pos = (self._pos + count) % cap
+            remaining = remaining[count:]
+
+    def latest(self, seconds: float) -> np.ndarray:
+        """View of the most recent `seconds` of audio (or less, if not yet filled)."""
+        n = min(self.fill, int(seconds * self.sample_rate))
+        end = self._pos + self.capacity
+        return self._data[end - n:end]
+
+    def since(self, position: int) -> np.ndarray:
+        """View from absolute sample `position` (in `written` terms) up to the newest sample."""
+        n = min(self.fill, max(0, self.written - position))
+        end = self._pos + self.capacity
+        return self._data[end - n:end]
+
+    def view(self) -> np.ndarray:
+        """View of everything currently held, oldest sample first."""
+        end = self._pos + self.capacity
+        return self._data[end - self.fill:end]
+
+    def clear(self):
+        self._pos = 0
+        self.fill = 0
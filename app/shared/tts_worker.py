@@ -0,0 +1,129 @@
+# app/shared/tts_worker.py
+
+import asyncio
+import io
+import os
+import shutil
+import tempfile
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+import av
+import pyttsx3
+
+
+class RenderedSpeech(NamedTuple):
+    wav: bytes
+    opus: bytes | None  # Ogg Opus, None if encoding failed
+
+
+def encode_ogg_opus(wav_bytes: bytes, bit_rate: int = 32000) -> bytes:
+    """Re-encode an in-memory WAV file as Ogg Opus (48 kHz mono) without touching disk."""
+    out = io.BytesIO()
+    with av.open(io.BytesIO(wav_bytes), format="wav") as src, av.open(out, mode="w", format="ogg") as dst:
+        stream = dst.add_stream("libopus", rate=48000, layout="mono")
+        stream.codec_context.bit_rate = bit_rate
+        for frame in src.decode(audio=0):
+            frame.pts = None
+            for packet in stream.encode(frame):
+                dst.mux(packet)
+        for packet in stream.encode(None):
+            dst.mux(packet)
+    return out.getvalue()
+
+
+class TTSWorker:
+    """Runs pyttsx3 on one dedicated thread and caches rendered speech by text.
+
+    pyttsx3 engines are tied to the thread that created them, so the engine
+    is built inside the worker thread and every render is queued onto it.
+    Each render gets its own scratch file, which is read back into memory and
+    removed immediately, so concurrent replies never share a file. The Opus
+    encode happens on the same thread, so cached entries hold both formats.
+    """
+
+    def __init__(self, cache_size: int = 64):
+        self.cache_size = cache_size
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tts", initializer=self._init_engine)
+        self._engine = None
+        self._scratch_dir = None
+        self._cache = OrderedDict()
+        self._pending = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _init_engine(self):
+        try:
+            import comtypes  # SAPI5 on Windows needs COM initialised per thread
+            comtypes.CoInitialize()
+        except ImportError:
+            pass
+        self._engine = pyttsx3.init()
+        self._scratch_dir = tempfile.mkdtemp(prefix="jarvis_tts_")
+
+    def _render(self, text: str) -> RenderedSpeech | None:
+        path = os.path.join(self._scratch_dir, f"{uuid.uuid4().hex}.wav")
+        try:
+            self._engine.save_to_file(text, path)
+            self._engine.runAndWait()
+            with open(path, "rb") as f:
+                wav = f.read()
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+        if not wav:
+            return None
+
+        try:
+            opus = encode_ogg_opus(wav)
+        except Exception as e:
+            print(f"⚠️ Opus encode failed for '{text}', falling back to WAV: {e}")
+            opus = None
+        return RenderedSpeech(wav, opus)
+
+    def _remember(self, text: str, audio: RenderedSpeech):
+        self._cache[text] = audio
+        self._cache.move_to_end(text)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def synthesize(self, text: str) -> RenderedSpeech | None:
+        cached = self._cache.get(text)
+        if cached is not None:
+            self._cache.move_to_end(text)
+            self.hits += 1
+            return cached
+
+        # Concurrent requests for the same text share one render
+        pending = self._pending.get(text)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        self.misses += 1
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor, self._render, text)
+        self._pending[text] = future
+        try:
+            audio = await asyncio.shield(future)
+        finally:
+            self._pending.pop(text, None)
+
+        if audio:
+            self._remember(text, audio)
+        return audio
+
+    async def prerender(self, phrases):
+        """Render fixed prompts ahead of time so they go out with no synthesis latency."""
+        for text in phrases:
+            try:
+                await self.synthesize(text)
+            except Exception as e:
+                print(f"⚠️ Failed to pre-render '{text}': {e}")
+        print(f"🗣️ Pre-rendered {len(self._cache)} TTS phrase(s)")
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if self._scratch_dir:
+            shutil.rmtree(self._scratch_dir, ignore_errors=True)
@@ -0,0 +1,57 @@
+# app/transcribe/batcher.py
+
+import asyncio
+
+from app.shared.metrics import RollingStats
+
+
+class MicroBatcher:
+    """Collects requests that arrive within a short window and runs them as one batch.
+
+    `run_batch` is an async callable taking a list of items and returning a
+    list of results in the same order. Each caller of `submit` gets its own
+    result back, or the batch's exception.
+    """
+
+    def __init__(self, run_batch, window_ms: float = 30, max_batch: int = 8):
+        self.run_batch = run_batch
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self._pending = []
+        self._flush_handle = None
+        self.batch_sizes = RollingStats()
+
+    async def submit(self, item):
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((item, future))
+
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(self.window, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+        if self._pending:
+            self._flush_handle = asyncio.get_running_loop().call_later(self.window, self._flush)
+        if batch:
+            asyncio.create_task(self._run(batch))
+
+    async def _run(self, batch):
+        self.batch_sizes.add(len(batch))
+        items = [item for item, _ in batch]
+        try:
+            results = await self.run_batch(items)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
@@ -0,0 +1,114 @@
+# app/transcribe/cascade.py
+#
+# Per-utterance model cascade. Every finalized utterance is decoded with the
+# fast model first; only unclear audio (low confidence, or a command whose
+# required slots can't be found in the text) is decoded again with the
+# active model picked by the latency selector. Streamed utterances run their
+# incremental passes on the first tier too, and escalate the same way.
+# The selector is fed the end-to-end latency of every utterance through the
+# cascade, whichever tier resolved it, since that is what players wait for.
+
+import time
+
+from app.transcribe.conditioning import condition_audio
+from app.config import WHISPER_CASCADE_FAST_MODEL, WHISPER_CASCADE_MIN_LOGPROB
+from app.transcribe.intent import fuzzy_intent
+from app.transcribe.model_manager import model_manager
+from app.transcribe.whisper_modal import Transcript, model_selector, transcribe
+from app.utils.dungeon import extract_dungeon_and_level, fuzzy_autocorrect
+from app.utils.helpers import extract_coords, normalize_transcript
+from app.utils.jarvis import heard_jarvis
+
+COORD_INTENTS = {"coord_panic", "ocean_boss"}
+DUNGEON_INTENTS = {"dungeon_panic", "red_alert"}
+
+
+def escalation_reason(transcript: Transcript, fallback_intent: str | None = None) -> str | None:
+    """Why a cheap transcript isn't good enough to act on, or None if it is."""
+    text = normalize_transcript(transcript.text)
+    if not text:
+        return "empty transcript"
+    if transcript.avg_logprob < WHISPER_CASCADE_MIN_LOGPROB:
+        return "low confidence"
+    if not fallback_intent and not heard_jarvis(text):
+        return "no wake word"
+
+    intent = fallback_intent or fuzzy_intent(text) or ("coord_panic" if extract_coords(text) else None)
+    if intent in COORD_INTENTS and not extract_coords(text):
+        return f"{intent} without coords"
+    # Autocorrect drops digits, so "level 3" is only found in the raw text
+    if intent in DUNGEON_INTENTS and extract_dungeon_and_level(text) == extract_dungeon_and_level(fuzzy_autocorrect(text)) == (None, None):
+        return f"{intent} without dungeon and level"
+    return None
+
+
+class ModelCascade:
+    """Tracks which tier each utterance was finally resolved on."""
+
+    def __init__(self, fast_model: str | None, report_every: int = 20):
+        self.fast_model = fast_model
+        self.report_every = report_every
+        self.resolved = {}
+        self.escalations = {}
+        self.utterances = 0
+
+    def tiers(self) -> list:
+        """Model sizes to try in order; None is whatever model is currently active."""
+        if not self.fast_model or self.fast_model == model_manager.active_size:
+            return [None]
+        return [self.fast_model, None]
+
+    async def transcribe(self, audio, fallback_intent: str | None = None) -> str:
+        start = time.monotonic()
+        tiers = self.tiers()
+        for i, model_size in enumerate(tiers):
+            transcript = await transcribe(audio, model_size)
+            name = model_size or model_manager.active_size
+            reason = escalation_reason(transcript, fallback_intent) if i + 1 < len(tiers) else None
+            if reason is None:
+                self._record(name, start)
+                return transcript.text
+            self.escalations[reason] = self.escalations.get(reason, 0) + 1
+            print(f"[Cascade] ⤴️ {name}: {reason} (avg_logprob {transcript.avg_logprob:.2f}), "
+                  f"re-decoding with {tiers[i + 1] or model_manager.active_size}")
+        return ""
+
+    def stream_model(self) -> str | None:
+        """Model a new StreamingTranscriber should run its passes on."""
+        return self.tiers()[0]
+
+    async def transcribe_stream(self, stream, fallback_intent: str | None = None) -> str:
+        """Final text of a streamed utterance, re-decoded whole with the active model if it isn't good enough."""
+        start = time.monotonic()
+        escalate_to_active = stream.model_size is not None and stream.model_size != model_manager.active_size
+        transcript = await stream.finalize(in_place=not escalate_to_active)
+        name = stream.model_size or model_manager.active_size
+        reason = escalation_reason(transcript, fallback_intent) if escalate_to_active else None
+        if reason is None:
+            self._record(name, start)
+            return transcript.text
+
+        self.escalations[reason] = self.escalations.get(reason, 0) + 1
+        print(f"[Cascade] ⤴️ {name} stream: {reason} (avg_logprob {transcript.avg_logprob:.2f}), "
+              f"re-decoding the utterance with {model_manager.active_size}")
+        audio, _ = condition_audio(stream.buffer.since(stream.start), in_place=True)   # the ring is detached, so it's ours
+        transcript = await transcribe(audio)
+        self._record(model_manager.active_size, start)
+        return transcript.text
+
+    def _record(self, tier: str, start: float):
+        model_selector.observe((time.monotonic() - start) * 1000)
+        self.resolved[tier] = self.resolved.get(tier, 0) + 1
+        self.utterances += 1
+        if self.utterances % self.report_every == 0:
+            print(f"[Cascade] 📊 {self.summary()}")
+
+    def hit_rates(self) -> dict:
+        return {tier: count / self.utterances for tier, count in self.resolved.items()} if self.utterances else {}
+
+    def summary(self) -> str:
+        rates = ", ".join(f"{tier} {rate:.0%}" for tier, rate in self.hit_rates().items())
+        return f"resolved by tier: {rates} (n={self.utterances}), escalations: {self.escalations}"
+
+
+cascade = ModelCascade(WHISPER_CASCADE_FAST_MODEL)
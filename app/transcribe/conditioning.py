@@ -0,0 +1,99 @@
+# app/transcribe/conditioning.py
+#
+# Last step before an utterance goes to Whisper. Silence costs decode time
+# and is where the "thanks for watching" style hallucinations come from, so
+# leading/trailing silence is dropped and long pauses are shortened, then
+# the leading pad gets a fade-in and the result peak normalization. Everything is
+# frame-level array math; there is no per-sample Python loop, and the
+# utterance can be conditioned where it lies without copying it.
+
+import numpy as np
+
+from app.config import (
+    CONDITION_MAX_GAIN, CONDITION_MAX_PAUSE_SECONDS, CONDITION_PAD_SECONDS, CONDITION_SILENCE_DB,
+    CONDITION_TARGET_PEAK, MODEL_SAMPLE_RATE,
+)
+
+FRAME_MS = 20
+SILENCE_FLOOR = 1e-3    # absolute RMS (about -60 dBFS) that never counts as speech
+
+
+def frame_rms(audio: np.ndarray, frame: int) -> np.ndarray:
+    """RMS of each `frame`-sample frame (the last one may be short), without a squared copy of the audio."""
+    full = len(audio) // frame
+    frames = audio[:full * frame].reshape(full, frame)
+    rms = np.sqrt(np.einsum("ij,ij->i", frames, frames) / frame)
+    tail = audio[full * frame:]
+    if len(tail):
+        rms = np.append(rms, np.sqrt(np.dot(tail, tail) / len(tail)))
+    return rms
+
+
+def condition_audio(audio: np.ndarray, sample_rate: int = MODEL_SAMPLE_RATE, fade_ms: int = 200,
+                    silence_db: float = CONDITION_SILENCE_DB, max_pause: float = CONDITION_MAX_PAUSE_SECONDS,
+                    pad: float = CONDITION_PAD_SECONDS, target_peak: float = CONDITION_TARGET_PEAK,
+                    max_gain: float = CONDITION_MAX_GAIN, in_place: bool = False) -> tuple[np.ndarray, float]:
+    """Trim, compress pauses, fade in and normalize float32 audio.
+
+    The fade covers at most the silence kept before the first voiced frame,
+    so it never attenuates the speech onset.
+
+    Returns the conditioned audio and the number of seconds removed. With
+    `in_place` the kept audio is compacted to the front of `audio` and a
+    view of it is returned, so no copy of the utterance is made; use it only
+    on audio nobody else reads (a detached ring buffer). An utterance with
+    no speech at all comes back empty.
+    """
+    audio = np.asarray(audio, dtype=np.float32)
+    frame = sample_rate * FRAME_MS // 1000
+    n_frames = -(-len(audio) // frame)
+    if n_frames == 0:
+        return audio[:0], 0.0
+
+    rms = frame_rms(audio, frame)
+    threshold = max(SILENCE_FLOOR, rms.max() * 10 ** (silence_db / 20))
+    voiced = rms > threshold
+    if not voiced.any():
+        return audio[:0], len(audio) / sample_rate
+
+    # Keep `pad` of context on both sides of every voiced frame
+    pad_frames = int(pad * 1000 / FRAME_MS)
+    kernel = np.ones(2 * pad_frames + 1)
+    keep = np.convolve(voiced, kernel, mode="same") > 0
+
+    # Inside the utterance, keep only the first `max_pause` of each longer gap
+    index = np.arange(n_frames)
+    last_kept = np.maximum.accumulate(np.where(keep, index, -1))
+    next_kept = np.minimum.accumulate(np.where(keep, index, n_frames)[::-1])[::-1]
+    inner = (last_kept >= 0) & (next_kept < n_frames)
+    keep |= inner & (index - last_kept <= int(max_pause * 1000 / FRAME_MS))
+
+    # Copy kept runs (a handful per utterance) into place, oldest first
+    edges = np.diff(np.concatenate(([0], keep.view(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1) * frame
+    ends = np.minimum(np.flatnonzero(edges == -1) * frame, len(audio))
+    total = int((ends - starts).sum())
+    out = audio[:total] if in_place else np.empty(total, dtype=np.float32)
+    position = 0
+    for start, end in zip(starts, ends):
+        if in_place and start == position:
+            position = end          # already where it belongs
+            continue
+        # In place, copy in steps no longer than the shift so source and destination never
+        # overlap; otherwise NumPy would buffer the whole run in a temporary
+        step = start - position if in_place else end - start
+        for offset in range(start, end, step):
+            count = min(step, end - offset)
+            out[position:position + count] = audio[offset:offset + count]
+            position += count
+
+    first_voiced = int(np.argmax(voiced))
+    lead = (first_voiced - max(0, first_voiced - pad_frames)) * frame   # pad kept before the speech
+    fade = min(len(out), lead, int(sample_rate * fade_ms / 1000))
+    out[:fade] *= np.arange(fade, dtype=np.float32) / max(1, fade - 1)
+
+    peak = max(float(out.max()), -float(out.min())) if len(out) else 0.0   # no abs() copy
+    if peak > 0:
+        out *= min(max_gain, target_peak / peak)
+
+    return out, (len(audio) - len(out)) / sample_rate
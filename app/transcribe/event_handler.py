@@ -2,7 +2,7 @@ import asyncio
 import re
 from app.irc.irc_bot import send_irc_message
 from app.websocket import send_speak_command
-import difflib
+from app.utils.vocab_index import VocabularyIndex
 # Global active event tracker
 active_event = {
     "event_name": None,
@@ -18,6 +18,7 @@ KNOWN_EVENTS = [
     "PVP Dungeon",
     "Faction Event",
 ]
+EVENT_INDEX = VocabularyIndex(KNOWN_EVENTS)
 
 async def handle_announce_event(text, user):
     match = re.search(r"announce (.+?) happening in (\d+)", text, re.IGNORECASE)
@@ -28,9 +29,9 @@ async def handle_announce_event(text, user):
 
         # 🎯 Smart event matching
         event_name = "Custom Event"
-        close = difflib.get_close_matches(raw_event_name, KNOWN_EVENTS, n=1, cutoff=0.6)
+        close = EVENT_INDEX.best_match(raw_event_name, 0.6)
         if close:
-            event_name = close[0]
+            event_name = close
         else:
             event_name = raw_event_name.title()  # fallback to whatever they said
 
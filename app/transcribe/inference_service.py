@@ -0,0 +1,81 @@
+# app/transcribe/inference_service.py
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.shared.metrics import RollingStats
+
+
+class InferenceService:
+    """Runs blocking model calls on a dedicated worker pool.
+
+    Async callers await `run(...)` and the event loop keeps serving WebSocket
+    ingest, IRC and timers while the model works. Queue depth, queue wait and
+    run time are tracked for every job.
+    """
+
+    def __init__(self, workers: int = 1, name: str = "whisper", report_interval: float = 60.0):
+        self.name = name
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.wait_ms = RollingStats()
+        self.run_ms = RollingStats()
+        self.report_interval = report_interval
+        self._last_report = time.monotonic()
+
+    @property
+    def queue_depth(self) -> int:
+        return self.queued
+
+    def _call(self, submitted_at, fn, args, kwargs):
+        started_at = time.monotonic()
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+        self.wait_ms.add((started_at - submitted_at) * 1000)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self.run_ms.add((time.monotonic() - started_at) * 1000)
+            with self._lock:
+                self.running -= 1
+                self.completed += 1
+
+    async def run(self, fn, *args, **kwargs):
+        with self._lock:
+            self.queued += 1
+        future = self._executor.submit(self._call, time.monotonic(), fn, args, kwargs)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            if future.cancel():  # never started, so _call won't dequeue it
+                with self._lock:
+                    self.queued -= 1
+            raise
+        finally:
+            self._maybe_report()
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "queued": self.queued,
+            "running": self.running,
+            "completed": self.completed,
+            "wait_p50_ms": round(self.wait_ms.p50, 1),
+            "wait_p95_ms": round(self.wait_ms.p95, 1),
+            "run_p50_ms": round(self.run_ms.p50, 1),
+            "run_p95_ms": round(self.run_ms.p95, 1),
+        }
+
+    def _maybe_report(self):
+        now = time.monotonic()
+        if now - self._last_report >= self.report_interval:
+            self._last_report = now
+            print(f"[Inference:{self.name}] 📊 queued {self.queued}, running {self.running}, "
+                  f"wait {self.wait_ms.summary()}, run {self.run_ms.summary()}")
@@ -1,7 +1,11 @@
-import difflib
+import asyncio
 import re
+from typing import NamedTuple
 from app.ai.classifier import classify_transcription_intent
+from app.utils.dungeon import extract_dungeon_and_level, fuzzy_autocorrect
 from app.utils.helpers import extract_coords, extract_direction
+from app.utils.jarvis import heard_jarvis
+from app.utils.vocab_index import VocabularyIndex
 
 INTENT_KEYWORDS = {
     "announce_event": ["announce", "happening in"],
@@ -14,41 +18,115 @@ INTENT_KEYWORDS = {
     "dungeon_panic": ["dungeon", "level", "dungeons"],
 }
 
+KEYWORD_INDEX = VocabularyIndex([keyword for keywords in INTENT_KEYWORDS.values() for keyword in keywords])
+
 def fuzzy_intent(text: str) -> str | None:
     lowered = text.lower()
 
+    # Fuzzy match with slight tolerance: every keyword close to some word of the transcript
+    heard = {keyword for word in set(lowered.split()) for _, keyword in KEYWORD_INDEX.matches(word, 0.8, query_first=True)}
+
     for intent, keywords in INTENT_KEYWORDS.items():
         for keyword in keywords:
-            # Fuzzy match with slight tolerance
-            matches = difflib.get_close_matches(keyword, lowered.split(), n=1, cutoff=0.8)
-            if matches:
+            if keyword in heard:
                 return intent
             if keyword in lowered:
                 return intent
     return None
 
-async def detect_high_level_intent(text: str) -> dict:
-    lowered = text.lower()
+class Speculation(NamedTuple):
+    text: str              # the partial transcript the LLM was asked about
+    task: asyncio.Task     # resolves to classify_transcription_intent(text)
 
-    # 📍 Try fuzzy intent matching first
-    intent = fuzzy_intent(lowered)
-    if intent:
-        if intent == "coord_panic":
-            coords = extract_coords(text)
-            direction = extract_direction(text)
-            if coords:
-                return {"intent": "coord_panic", "coords": coords, "direction": direction}
-        if intent == "ocean_boss":
-            coords = extract_coords(text)
-            return {"intent": "ocean_boss", "coords": coords}
-        return {"intent": intent}
+def rule_based_intent(text: str, intent: str | None) -> dict:
+    """Everything the regex and fuzzy passes can fill in for `text`, given the fuzzy intent."""
+    coords = extract_coords(text)
+    if intent == "ocean_boss":
+        return {"intent": "ocean_boss", "coords": coords}
 
     # 📍 Direct coordinate match fallback
-    coords = extract_coords(text)
-    if coords:
-        direction = extract_direction(text)
-        return {"intent": "coord_panic", "coords": coords, "direction": direction}
+    if intent is None and coords:
+        intent = "coord_panic"
+    if intent is None:
+        return {"intent": "unknown"}
+
+    result = {"intent": intent}
+    if intent == "coord_panic" and coords:
+        result.update(coords=coords, direction=extract_direction(text))
+    if intent == "dungeon_panic":
+        dungeon, level = extract_dungeon_and_level(fuzzy_autocorrect(text))
+        if dungeon and level:
+            result.update(dungeon=dungeon, level=level)
+    return result
+
+def needs_llm(result: dict) -> bool:
+    """Rule answers that end in an LLM call anyway: nothing recognised, or a dungeon panic without its slots.
+
+    Everything else (red alerts, coord panics without coords, ...) is settled
+    by the rules straight away; their handlers ask the player instead.
+    """
+    intent = result.get("intent")
+    return intent == "unknown" or (intent == "dungeon_panic" and not (result.get("dungeon") and result.get("level")))
+
+def merge_llm_result(rules: dict, llm: dict) -> dict:
+    """The rules' intent and slots, with the LLM filling whatever they missed."""
+    if rules.get("intent") == "unknown":
+        return llm
+    merged = {**llm, **{slot: value for slot, value in rules.items() if value is not None}}
+    merged["intent"] = rules["intent"]
+    return merged
+
+def speculate_intent(partial_text: str) -> Speculation | None:
+    """Start the LLM on the committed words of a streamed utterance while its tail is still being decoded.
+
+    Only when the rules can't settle those words and the utterance would
+    otherwise end up at the LLM. detect_high_level_intent either uses the
+    answer or cancels the request.
+    """
+    if len(partial_text.split()) < 3 or not heard_jarvis(partial_text):
+        return None
+    if not needs_llm(rule_based_intent(partial_text, fuzzy_intent(partial_text.lower()))):
+        return None
+    print(f"[Intent Detect] 🏁 Asking the LLM about '{partial_text}' while the tail is decoded")
+    return Speculation(partial_text, asyncio.create_task(classify_transcription_intent(partial_text)))
+
+async def detect_high_level_intent(text: str, speculation: Speculation | None = None) -> dict:
+    # 📍 Fuzzy intent and slot passes first
+    result = rule_based_intent(text, fuzzy_intent(text.lower()))
+    if not needs_llm(result):
+        if speculation:
+            speculation.task.cancel()
+        return result
+
+    if speculation is None or speculation.task.cancelled():
+        # 🤖 Full fallback: classify with LLM
+        print("[Intent Detect] 🤖 Falling back to LLM for deeper understanding...")
+        llm_result = await classify_transcription_intent(text)
+    elif speculation.text == text:
+        llm_result = await speculation.task
+    else:
+        llm_result = await race_speculation(result, speculation, text)
+    print(f"[Intent Detect] 🤖 LLM answered: {llm_result}")
+    return merge_llm_result(result, llm_result)
+
+async def race_speculation(rules: dict, speculation: Speculation, text: str) -> dict:
+    """Ask about the whole utterance too; whichever answer settles the command first wins.
 
-    # 🤖 Full fallback: classify with LLM
-    print("[Intent Detect] 🤖 Falling back to LLM for deeper understanding...")
-    return await classify_transcription_intent(text)
\ No newline at end of file
+    The answer about the committed words only counts if, merged with the
+    rules, it fills everything; the answer about the full text always counts.
+    """
+    print("[Intent Detect] 🏁 Racing the partial-transcript answer against one for the whole utterance...")
+    full = asyncio.create_task(classify_transcription_intent(text))
+    pending = {speculation.task, full}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            if full in done:
+                return full.result()
+            if speculation.task in done and not needs_llm(merge_llm_result(rules, speculation.task.result())):
+                print("[Intent Detect] ⚡ Partial transcript settled it")
+                return speculation.task.result()
+        return full.result()
+    finally:
+        for task in pending:
+            task.cancel()
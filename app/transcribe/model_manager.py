@@ -0,0 +1,197 @@
+# app/transcribe/model_manager.py
+#
+# Owns the loaded Whisper models. Nothing is loaded at import time: a model
+# is loaded the first time it is needed and gets a warm-up decode before it
+# serves traffic. Several models can stay resident within a memory budget,
+# so switching between them is a reference swap rather than a reload.
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+
+import ctranslate2
+import numpy as np
+from faster_whisper import WhisperModel
+
+from app.config import (
+    MODEL_SAMPLE_RATE, WHISPER_CPU_COMPUTE_TYPE, WHISPER_CPU_THREADS, WHISPER_DEFAULT_MODEL, WHISPER_DEVICE,
+    WHISPER_GPU_COMPUTE_TYPE, WHISPER_INFERENCE_WORKERS, WHISPER_MODEL_BUDGET_MB, WHISPER_RESIDENT_MODELS,
+)
+
+# Rough resident size per model (weights plus runtime buffers), used for the budget
+MODEL_MEMORY_MB = {
+    "tiny.en": 150,
+    "base.en": 300,
+    "small.en": 1000,
+    "medium.en": 3000,
+    "distil-large-v3": 3000,
+    "large-v3": 6000,
+}
+
+
+def select_device(preference: str = WHISPER_DEVICE) -> str:
+    if preference != "auto":
+        return preference
+    try:
+        return "cuda" if ctranslate2.get_cuda_device_count() > 0 else "cpu"
+    except Exception:
+        return "cpu"
+
+
+def model_options(device: str) -> dict:
+    """WhisperModel kwargs for a device: float16 on GPU, int8 with tuned threads on CPU."""
+    if device == "cuda":
+        return {"device": "cuda", "compute_type": WHISPER_GPU_COMPUTE_TYPE, "num_workers": WHISPER_INFERENCE_WORKERS}
+    return {
+        "device": "cpu",
+        "compute_type": WHISPER_CPU_COMPUTE_TYPE,
+        "cpu_threads": WHISPER_CPU_THREADS,
+        "num_workers": WHISPER_INFERENCE_WORKERS,
+    }
+
+
+def load_model(model_size):
+    device = select_device()
+    try:
+        options = model_options(device)
+        print(f"[WhisperLoader] 🔥 Loading {model_size} model on {device} ({options['compute_type']})...")
+        model = WhisperModel(model_size, **options)
+    except Exception as e:
+        if device != "cuda":
+            print(f"[WhisperLoader] ❌ Failed to load {model_size}: {e}")
+            return None
+        # A broken CUDA install should leave us slower, not deaf
+        print(f"[WhisperLoader] ⚠️ {model_size} failed on cuda ({e}), retrying on cpu")
+        try:
+            model = WhisperModel(model_size, **model_options("cpu"))
+        except Exception as e:
+            print(f"[WhisperLoader] ❌ Failed to load {model_size}: {e}")
+            return None
+    print(f"[WhisperLoader] ✅ {model_size} loaded!")
+    return model
+
+
+def warm_up(model) -> float:
+    """Run one decode so CUDA kernels, allocators and caches are ready. Returns its latency in ms."""
+    start = time.monotonic()
+    segments, _ = model.transcribe(np.zeros(MODEL_SAMPLE_RATE, dtype=np.float32), beam_size=1)
+    list(segments)
+    return (time.monotonic() - start) * 1000
+
+
+class ModelManager:
+    """Lazily loaded, warm, budgeted set of Whisper models with one active model.
+
+    The active model and its size are replaced together in a single
+    assignment, so a transcription that already picked up a model keeps
+    using it while a swap or eviction happens; nobody ever sees "no model".
+    """
+
+    def __init__(self, default_size: str, resident_sizes=(), budget_mb: float = 2048):
+        self.default_size = default_size
+        self.resident_sizes = list(resident_sizes)
+        self.budget_mb = budget_mb
+        self._models = OrderedDict()      # size -> model, least recently used first
+        self._active = None               # (model, size)
+        self._lock = threading.Lock()     # one load at a time
+        self.load_seconds = {}
+        self.first_inference_ms = {}
+        self.swaps = 0
+
+    @property
+    def active_size(self) -> str | None:
+        return self._active[1] if self._active else None
+
+    @property
+    def resident(self) -> list:
+        return list(self._models)
+
+    def resident_mb(self) -> float:
+        return sum(MODEL_MEMORY_MB.get(size, 1000) for size in self._models)
+
+    def ensure_loaded(self, model_size: str):
+        """Blocking: return the model for `model_size`, loading and warming it if needed."""
+        with self._lock:
+            model = self._models.get(model_size)
+            if model is not None:
+                self._models.move_to_end(model_size)
+                return model
+
+            start = time.monotonic()
+            model = load_model(model_size)
+            if model is None:
+                return None
+            self.load_seconds[model_size] = time.monotonic() - start
+            self.first_inference_ms[model_size] = warm_up(model)
+            print(f"[WhisperLoader] 🌡️ {model_size} ready: load {self.load_seconds[model_size]:.1f}s, "
+                  f"first inference {self.first_inference_ms[model_size]:.0f} ms")
+            self._models[model_size] = model
+            self._evict(keep=model_size)
+            return model
+
+    def _evict(self, keep: str):
+        while self.resident_mb() > self.budget_mb:
+            # Least recently used first, models outside the configured resident set before those in it
+            candidates = [s for s in self._models if s not in (keep, self.active_size)]
+            if not candidates:
+                break
+            victim = sorted(candidates, key=lambda s: s in self.resident_sizes)[0]
+            del self._models[victim]
+            print(f"[WhisperLoader] 🔥 Evicted {victim} to stay within {self.budget_mb} MB")
+
+    def switch(self, model_size: str) -> bool:
+        """Blocking: make `model_size` the active model. The old one stays usable until its callers finish."""
+        model = self.ensure_loaded(model_size)
+        if model is None:
+            return False
+        if self.active_size != model_size:
+            previous = self.active_size
+            self._active = (model, model_size)
+            self.swaps += 1
+            print(f"[WhisperLoader] 🔁 Active model {previous} -> {model_size}")
+        return True
+
+    def acquire(self):
+        """Blocking: the active (model, size), loading the default model on first use."""
+        if self._active is None:
+            self.switch(self.default_size)
+        return self._active or (None, None)
+
+    async def acquire_async(self):
+        if self._active is not None:
+            return self._active
+        return await asyncio.to_thread(self.acquire)
+
+    async def model_async(self, model_size: str):
+        """A specific model without making it active (cascade tiers), loading it off the event loop if needed."""
+        model = self._models.get(model_size)
+        if model is not None:
+            return model
+        return await asyncio.to_thread(self.ensure_loaded, model_size)
+
+    async def switch_async(self, model_size: str) -> bool:
+        return await asyncio.to_thread(self.switch, model_size)
+
+    def preload(self):
+        """Blocking: load and warm every configured resident model, then activate the default."""
+        for model_size in self.resident_sizes:
+            self.ensure_loaded(model_size)
+        if self._active is None and not self.switch(self.default_size):
+            print(f"[WhisperLoader] 🚨 Could not load {self.default_size}; transcription is unavailable.")
+
+    async def preload_async(self):
+        await asyncio.to_thread(self.preload)
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active_size,
+            "resident": self.resident,
+            "resident_mb": self.resident_mb(),
+            "swaps": self.swaps,
+            "load_seconds": {k: round(v, 2) for k, v in self.load_seconds.items()},
+            "first_inference_ms": {k: round(v, 1) for k, v in self.first_inference_ms.items()},
+        }
+
+
+model_manager = ModelManager(WHISPER_DEFAULT_MODEL, WHISPER_RESIDENT_MODELS, WHISPER_MODEL_BUDGET_MB)
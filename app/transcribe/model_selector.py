@@ -0,0 +1,113 @@
+# app/transcribe/model_selector.py
+#
+# Picks the Whisper model from what players actually experience: the
+# end-to-end latency of each transcription and the inference queue depth.
+# Works the same on CPU and GPU hosts because it never asks the hardware.
+
+import asyncio
+import time
+
+from app.shared.metrics import RollingStats
+
+
+class ModelSelector:
+    """Moves along a model ladder to keep transcription p95 under a target.
+
+    `ladder` is ordered from most accurate (slowest) to fastest. Breaching
+    the target, or a backed-up queue, for `downgrade_checks` consecutive
+    checks steps one rung faster. Staying well under the target
+    (`upgrade_ratio` of it) with an empty queue for `upgrade_checks`
+    consecutive checks steps one rung back up. No step is taken within
+    `min_dwell` seconds of the previous one, and the latency window is
+    reset on every switch so the next decision only sees the new model.
+    """
+
+    def __init__(self, model_manager, inference_service, ladder, p95_target_ms: float, max_queue_depth: int = 4,
+                 interval: float = 5.0, downgrade_checks: int = 2, upgrade_checks: int = 6,
+                 upgrade_ratio: float = 0.5, min_dwell: float = 30.0, min_samples: int = 5):
+        self.model_manager = model_manager
+        self.inference_service = inference_service
+        self.ladder = list(ladder)
+        self.p95_target_ms = p95_target_ms
+        self.max_queue_depth = max_queue_depth
+        self.interval = interval
+        self.downgrade_checks = downgrade_checks
+        self.upgrade_checks = upgrade_checks
+        self.upgrade_ratio = upgrade_ratio
+        self.min_dwell = min_dwell
+        self.min_samples = min_samples
+        self.latency_ms = RollingStats(window=50)
+        self._over = 0
+        self._under = 0
+        self._last_switch = float("-inf")
+        self.switches = 0
+
+    def observe(self, latency_ms: float):
+        """Record one utterance's end-to-end transcription latency (every cascade tier, queueing, batching and decode)."""
+        self.latency_ms.add(latency_ms)
+
+    def _rung(self) -> int | None:
+        size = self.model_manager.active_size
+        return self.ladder.index(size) if size in self.ladder else None
+
+    def decide(self, now: float):
+        """Update the breach counters and return the rung to move to, or None to stay."""
+        rung = self._rung()
+        if rung is None:
+            return None
+
+        p95 = self.latency_ms.p95
+        samples = len(self.latency_ms.samples)
+        queued = self.inference_service.queue_depth
+
+        backed_up = queued >= self.max_queue_depth
+        if backed_up or (samples >= self.min_samples and p95 > self.p95_target_ms):
+            self._over, self._under = self._over + 1, 0
+        elif samples >= self.min_samples and p95 < self.p95_target_ms * self.upgrade_ratio and queued == 0:
+            self._over, self._under = 0, self._under + 1
+        else:
+            self._over = self._under = 0
+
+        if now - self._last_switch < self.min_dwell:
+            return None
+        if self._over >= self.downgrade_checks and rung + 1 < len(self.ladder):
+            return rung + 1, f"over SLO: p95 {p95:.0f} ms (n={samples}), queue {queued}/{self.max_queue_depth}"
+        if self._under >= self.upgrade_checks and rung > 0:
+            return rung - 1, f"under SLO: p95 {p95:.0f} ms (n={samples}), queue {queued}/{self.max_queue_depth}"
+        return None
+
+    async def check(self, now: float):
+        decision = self.decide(now)
+        if decision:
+            await self._switch(*decision, now)
+
+    async def fall_back(self, reason: str) -> bool:
+        """Step one rung faster right away (e.g. after a decode error). False if there is nowhere to go."""
+        rung = self._rung()
+        if rung is None or rung + 1 >= len(self.ladder):
+            return False
+        return await self._switch(rung + 1, reason, time.monotonic())
+
+    async def _switch(self, rung: int, reason: str, now: float) -> bool:
+        previous = self.model_manager.active_size
+        target = self.ladder[rung]
+        print(f"[ModelSelector] ⚖️ {reason}, target p95 {self.p95_target_ms:.0f} ms -> {previous} to {target}")
+        # Loading a model from disk happens off the event loop; the stats stay on it
+        switched = await self.model_manager.switch_async(target)
+        if switched:
+            self.switches += 1
+        else:
+            print(f"[ModelSelector] ❌ Could not switch to {target}, staying on {previous}")
+        self._last_switch = now
+        self._over = self._under = 0
+        self.latency_ms = RollingStats(window=50)
+        return switched
+
+    async def run(self):
+        print(f"[ModelSelector] 🚀 Targeting p95 {self.p95_target_ms:.0f} ms over ladder {' > '.join(self.ladder)}")
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.check(time.monotonic())
+            except Exception as e:
+                print(f"[ModelSelector] ⚠️ Check failed: {e}")
@@ -1,5 +1,6 @@
 import re
 from app.ai.classifier import extract_coordinates_with_llm
+from app.ai.extraction import NOT_ASKED
 from app.state import user_context
 from app.utils.coords import validate_coords
 from app.utils.dungeon import extract_dungeon_and_level, extract_dungeon_with_llm, get_dungeon_from_text
@@ -89,16 +90,16 @@ async def handle_active_panic(user, text):
         return await resolve_and_handle_dungeon_panic(user, text, None, None), "silent"
     return None, "silent"
 
-async def resolve_and_handle_coord_panic(user, text, coords=None, direction=None):
+async def resolve_and_handle_coord_panic(user, text, coords=None, direction=None, extraction=NOT_ASKED):
     from app.utils.helpers import extract_coords, extract_direction, validate_coords
 
     # Try regex-based extraction first
     coords = coords or extract_coords(text)
     direction = direction or extract_direction(text)
 
-    # If coords failed, try LLM fallback
+    # If coords failed, try LLM fallback (reusing the intent pass's extraction when there was one)
     if not coords:
-        coords = await extract_coordinates_with_llm(text)
+        coords = await extract_coordinates_with_llm(text, extraction)
 
     if coords and validate_coords(coords):
         await update_coord_panic(user, coords, direction)
@@ -107,9 +108,10 @@ async def resolve_and_handle_coord_panic(user, text, coords=None, direction=None
         await send_speak_command(user, "Repeat the coordinates?")
         return False
     
-async def resolve_and_handle_dungeon_panic(user: str, text: str, dungeon: str | None, level: str | None) -> bool:
+async def resolve_and_handle_dungeon_panic(user: str, text: str, dungeon: str | None, level: str | None,
+                                          extraction=NOT_ASKED) -> bool:
     if not (dungeon and level):
-        result = await get_dungeon_from_text(text)
+        result = await get_dungeon_from_text(text, extraction)
         if result:
             dungeon, level = result
         else:
@@ -0,0 +1,67 @@
+# app/transcribe/streaming.py
+#
+# Incremental transcription of one utterance while it is still being spoken.
+#
+# Every pass decodes only the audio after the last committed word. Words
+# that two consecutive passes agree on, as a common prefix, are committed and
+# the cursor moves past them (LocalAgreement-2). At end of speech only the
+# short, still-unstable tail needs one more decode. Passes run on the model
+# the stream was started with (the cascade's first tier).
+
+import re
+
+from app.config import MODEL_SAMPLE_RATE, STREAM_MIN_SECONDS
+from app.transcribe.conditioning import condition_audio
+from app.transcribe.whisper_modal import Transcript, transcribe, transcribe_words
+
+
+def normalize_word(word: str) -> str:
+    return re.sub(r"[^a-z0-9]", "", word.lower())
+
+
+class StreamingTranscriber:
+    def __init__(self, buffer, start: int, model_size: str | None = None):
+        self.buffer = buffer            # the speaker's AudioRingBuffer this stream reads from
+        self.start = start              # ring `written` position where the utterance starts
+        self.model_size = model_size    # None follows the active model
+        self.committed_pos = start      # ring `written` position where uncommitted audio starts
+        self.committed = []
+        self.previous = []
+        self.passes = 0
+
+    @property
+    def committed_text(self) -> str:
+        return " ".join(self.committed)
+
+    async def step(self):
+        audio = self.buffer.since(self.committed_pos)
+        if len(audio) < STREAM_MIN_SECONDS * MODEL_SAMPLE_RATE:
+            return
+
+        words = await transcribe_words(audio, self.committed_text, self.model_size)
+        self.passes += 1
+        hypothesis = [normalize_word(w) for w, _, _ in words]
+
+        agreed = 0
+        while agreed < min(len(hypothesis), len(self.previous)) and hypothesis[agreed] == self.previous[agreed]:
+            agreed += 1
+
+        if agreed:
+            self.committed.extend(w for w, _, _ in words[:agreed])
+            self.committed_pos += int(words[agreed - 1][2] * MODEL_SAMPLE_RATE)
+            print(f"[Streaming] ✅ Committed: '{self.committed_text}'")
+        self.previous = hypothesis[agreed:]
+
+    async def finalize(self, in_place: bool = True) -> Transcript:
+        """Committed prefix plus a decode of whatever audio is left after it.
+
+        The confidence is the tail's; committed words already agreed across
+        two passes. Pass `in_place=False` if the utterance may be decoded
+        again from `start`, since in-place conditioning rewrites the tail.
+        """
+        tail, _ = condition_audio(self.buffer.since(self.committed_pos), in_place=in_place)   # ring is detached by now
+        tail_text, avg_logprob = "", 0.0
+        if len(tail) >= 0.2 * MODEL_SAMPLE_RATE:
+            tail_text, avg_logprob = await transcribe(tail, self.model_size)
+        text = " ".join(part for part in (self.committed_text, tail_text) if part).strip()
+        return Transcript(text, avg_logprob)
@@ -1,26 +1,43 @@
 import asyncio
+import io
+from app.config import (
+    ENDPOINTING, MIN_UTTERANCE_SECONDS, MODEL_SAMPLE_RATE, MONITOR_INTERVAL, STREAM_STEP_SECONDS,
+    VAD_HANGOVER_SECONDS, VAD_MAX_UTTERANCE_SECONDS, WAKE_PREROLL_SECONDS, WAKE_TEMPLATE_DIR,
+)
+from app.ai.extraction import NOT_ASKED
+from app.ai.llm_client import llm_client
 from app.irc.irc_bot import send_irc_message
+from app.shared.metrics import RollingStats
+from app.transcribe.cascade import cascade
+from app.transcribe.conditioning import condition_audio
 from app.transcribe.event_handler import check_event_trigger, handle_announce_event, handle_cancel_event, handle_start_event
-from app.transcribe.intent import detect_high_level_intent
+from app.transcribe.intent import detect_high_level_intent, speculate_intent
 from app.transcribe.other_handlers import handle_ocean_boss, retry_ocean_boss
 from app.transcribe.panic_handlers import handle_active_panic, handle_stop_panic, resolve_and_handle_coord_panic, resolve_and_handle_dungeon_panic
+from app.transcribe.streaming import StreamingTranscriber
+from app.transcribe.vad import vad
+from app.transcribe.wake_spotter import wake_spotter
 from app.transcribe.whisper_modal import transcribe_audio_buffer
 from app.utils.helpers import normalize_transcript
-from app.utils.jarvis import heard_jarvis
-from app.websocket import pop_audio_buffer, send_speak_command, user_buffers
+from app.utils.jarvis import JARVIS_ALIASES, heard_jarvis
+from app.websocket import pop_audio_buffer, send_speak_command, tts_worker, user_buffers
 from app.state import user_context
 
 
 
-async def transcribe_and_check_command(audio_bytes, user, fallback_intent=None, retry_data=None):
-    print(f"[Transcribe] 🔝 Transcribing {user} ({len(audio_bytes)} bytes)...")
-    raw_text = await transcribe_audio_buffer(audio_bytes)
+async def transcribe_and_check_command(audio, user, fallback_intent=None, retry_data=None):
+    print(f"[Transcribe] 🔝 Transcribing {user} ({len(audio) / MODEL_SAMPLE_RATE:.1f}s)...")
+    raw_text = await cascade.transcribe(audio, fallback_intent)
+    return await check_command(raw_text, user, fallback_intent)
+
+async def check_command(raw_text, user, fallback_intent=None, speculation=None):
     text = normalize_transcript(raw_text)
     print(f"[Transcribe] {user} ⏺ '{text}'")
     if not text:
         return None, "silent"
 
-    if not fallback_intent and "jarvis" not in text.lower():
+    # Same fuzzy wake-word rule the cascade accepts a transcript with
+    if not fallback_intent and not heard_jarvis(text):
         return None, "silent"
 
     user_context[user]["last_transcription"] = text
@@ -42,12 +59,13 @@ async def transcribe_and_check_command(audio_bytes, user, fallback_intent=None,
             return await retry_ocean_boss(user, text)
 
     # 🔍 Detect intent
-    result = await detect_high_level_intent(text)
+    result = await detect_high_level_intent(text, speculation)
     intent = result.get("intent")
     coords = result.get("coords")
     direction = result.get("direction")
     dungeon = result.get("dungeon")
     level = result.get("level")
+    extraction = result.pop("extraction", NOT_ASKED)   # the LLM's answer, if the intent pass asked for one
 
     user_context[user]["last_intent"] = intent
     
@@ -65,7 +83,7 @@ async def transcribe_and_check_command(audio_bytes, user, fallback_intent=None,
 
     if intent == "coord_panic":
         if coords:
-            return await resolve_and_handle_coord_panic(user, text, coords, direction), "silent"
+            return await resolve_and_handle_coord_panic(user, text, coords, direction, extraction), "silent"
         else:
             await send_speak_command(user, "Repeat the coordinates?")
             return False, "responded"
@@ -86,13 +104,26 @@ async def transcribe_and_check_command(audio_bytes, user, fallback_intent=None,
         return True, "silent"  # 🚫 Do NOT run dungeon panic
 
     if intent in ["dungeon_panic"]:
-        return await resolve_and_handle_dungeon_panic(user, text, dungeon, level), "silent"
+        return await resolve_and_handle_dungeon_panic(user, text, dungeon, level, extraction), "silent"
 
 
     print(f"🗑️ No actionable intent detected from {user}. Full result: {result}")
     return False, "silent"
 
 HOLD_BUFFER_TIME = 2.5
+MIN_BUFFER_SECONDS = 1.0       # nothing to do below this
+PREVIEW_SECONDS = 1.5          # trailing window checked for "Jarvis"
+FINALIZE_SECONDS = 5 / 3       # minimum utterance length before finalizing
+RETRY_FINALIZE_SECONDS = 1.0   # shorter minimum while waiting on a retry
+PREVIEW_INTERVAL = 1.0         # Whisper preview rate per speaker until the spotter has recorded templates
+
+# End of speech -> command handled, per endpointing mode
+command_latency = RollingStats()
+llm_round_trips = RollingStats()   # Ollama requests per handled command
+last_preview = {}
+streams = {}          # user -> StreamingTranscriber for the utterance in progress
+wake_positions = {}   # user -> (ring buffer, `written` position where the wake word starts)
+last_stream_step = {}
 
 def clear_retry_state(user_id, retry_state, jarvis_watch, jarvis_hold_until):
     retry_state.pop(user_id, None)
@@ -104,7 +135,7 @@ def should_finalize_buffer(user_id, now, jarvis_watch, jarvis_timeout, jarvis_ho
         return False
 
     # 🔥 Shorter buffer size if retrying
-    min_buffer_len = 96000 if user_id in retry_state else 160000
+    min_seconds = RETRY_FINALIZE_SECONDS if user_id in retry_state else FINALIZE_SECONDS
 
     # 🔥 If retry cooldown is active, block finalization
     retry = retry_state.get(user_id)
@@ -112,26 +143,30 @@ def should_finalize_buffer(user_id, now, jarvis_watch, jarvis_timeout, jarvis_ho
         return False
 
     return (
-        len(buffer) > min_buffer_len and (
+        buffer.duration > min_seconds and (
             user_id not in jarvis_watch or
             (user_id in jarvis_watch and now - jarvis_watch[user_id] > jarvis_timeout)
         )
     )
 
-def fade_in_audio(pcm_data: bytes, duration_ms: int = 200, sample_rate: int = 48000) -> bytes:
-    """Apply a linear fade-in to raw 16-bit PCM audio."""
-    import numpy as np
-
-    samples = np.frombuffer(pcm_data, dtype=np.int16)
-
-    fade_samples = int(sample_rate * (duration_ms / 1000.0))
-    fade_samples = min(fade_samples, len(samples))
+def should_finalize_on_vad(user_id, now, jarvis_watch, buffer, retry_state):
+    """Finalize on real end-of-speech (VAD) plus a short hangover."""
+    retry = retry_state.get(user_id)
+    if retry and "cooldown_until" in retry and now < retry["cooldown_until"]:
+        return False
 
-    fade_curve = np.linspace(0, 1, fade_samples)
+    if buffer.duration < MIN_UTTERANCE_SECONDS:
+        return False
 
-    samples[:fade_samples] = (samples[:fade_samples] * fade_curve).astype(np.int16)
+    if not vad.speech_ended(user_id, now, VAD_HANGOVER_SECONDS):
+        # Still talking: only cut in if the utterance runs far too long
+        started = jarvis_watch.get(user_id) or (retry or {}).get("started_at")
+        return started is not None and now - started > VAD_MAX_UTTERANCE_SECONDS
 
-    return samples.tobytes()
+    # In retry mode, wait until they actually answered the prompt
+    if user_id not in jarvis_watch and retry:
+        return (vad.last_voice_time(user_id) or 0) > retry["started_at"]
+    return True
 
 def should_wait_for_retry(user_id, now, retry_state):
     retry = retry_state.get(user_id)
@@ -140,10 +175,49 @@ def should_wait_for_retry(user_id, now, retry_state):
 async def handle_transcription(user_id, buffer, fallback_intent):
     print(f"🔁 Finalizing buffer for {user_id}{' (retry mode)' if fallback_intent else ''}...")
     success, speech_status = await transcribe_and_check_command(
-        bytes(buffer), user_id, fallback_intent=fallback_intent
+        buffer, user_id, fallback_intent=fallback_intent
     )
     return success, speech_status
 
+async def handle_streamed_transcription(user_id, stream, fallback_intent):
+    print(f"🔁 Finalizing stream for {user_id} ({stream.passes} pass(es)){' (retry mode)' if fallback_intent else ''}...")
+    # 🏁 The LLM can start on the committed words while the tail decode runs
+    speculation = None if fallback_intent else speculate_intent(normalize_transcript(stream.committed_text))
+    try:
+        raw_text = await cascade.transcribe_stream(stream, fallback_intent)
+        return await check_command(raw_text, user_id, fallback_intent, speculation)
+    finally:
+        # A speculative LLM request nobody picked up must not keep its slot
+        if speculation:
+            speculation.task.cancel()
+
+def utterance_start(user_id, buffer) -> int:
+    """Ring position final decoding starts from: the wake word minus pre-roll, or everything held."""
+    oldest = buffer.written - buffer.fill
+    wake = wake_positions.get(user_id)
+    if wake is None or wake[0] is not buffer:
+        return oldest
+    return max(oldest, wake[1] - int(WAKE_PREROLL_SECONDS * MODEL_SAMPLE_RATE))
+
+def get_stream(user_id, buffer):
+    """The speaker's streaming transcriber, restarted if their ring buffer was replaced."""
+    stream = streams.get(user_id)
+    if stream is None or stream.buffer is not buffer:
+        stream = streams[user_id] = StreamingTranscriber(buffer, utterance_start(user_id, buffer), cascade.stream_model())
+    return stream
+
+def prune_speaker_state(active_users):
+    """Forget streaming and preview state of speakers nobody is going to finalize.
+
+    Covers speakers whose ring was evicted or who went quiet without a
+    finalize (wake word timed out, retry abandoned).
+    """
+    for table in (streams, last_stream_step, wake_positions):
+        for user_id in [u for u in table if u not in active_users]:
+            del table[user_id]
+    for user_id in [u for u in last_preview if u not in user_buffers]:
+        del last_preview[user_id]
+
 async def handle_retry_logic(user_id, now, success, speech_status, retry_state, jarvis_watch, jarvis_hold_until):
     retry = retry_state.get(user_id)
     delay = 6 if speech_status == "responded" else 2
@@ -173,6 +247,102 @@ async def handle_retry_logic(user_id, now, success, speech_status, retry_state,
             retry["next_retry"] = now + delay
             print(f"🕓 Waiting for retry {retry['attempts']} from {user_id} in {delay:.1f}s")
 
+async def process_user(user_id, now, retry_state, jarvis_watch, jarvis_hold_until, jarvis_timeout):
+    buffer = user_buffers.get(user_id)
+    if buffer is None or buffer.duration < MIN_BUFFER_SECONDS:
+        return
+
+    # 🔍 Check for "Jarvis": Whisper confirms what the spotter flagged, and keeps its own
+    # periodic previews until the spotter has templates recorded from real speakers
+    preview_audio = None
+    wake_start = None
+    detection = wake_spotter.pop_detection(user_id) if wake_spotter.enabled else None
+    if detection:
+        last_preview[user_id] = now
+        preroll = int(WAKE_PREROLL_SECONDS * MODEL_SAMPLE_RATE)
+        preview_audio = buffer.since(detection.start - preroll)
+        wake_start = detection.start
+    elif not wake_spotter.trusted and buffer.duration >= PREVIEW_SECONDS and now - last_preview.get(user_id, 0) >= PREVIEW_INTERVAL:
+        last_preview[user_id] = now
+        preview_audio = buffer.latest(PREVIEW_SECONDS)
+        wake_start = buffer.written - len(preview_audio)   # only known to within the preview window
+
+    if preview_audio is not None and len(preview_audio):
+        preview = await transcribe_audio_buffer(preview_audio, profile="preview")
+        if preview and heard_jarvis(preview):
+            print(f"👁️ Heard 'Jarvis' early from {user_id}, extending buffer...")
+            # Keep the first wake word of an utterance; later repeats don't move the crop point
+            wake = wake_positions.get(user_id)
+            if user_id not in jarvis_watch or wake is None or wake[0] is not buffer:
+                wake_positions[user_id] = (buffer, wake_start)
+            jarvis_watch[user_id] = now
+            jarvis_hold_until[user_id] = now + HOLD_BUFFER_TIME
+            retry_state.pop(user_id, None)
+        elif not preview.strip():
+            print(f"👂 Ignored empty preview for {user_id}")
+
+    if should_wait_for_retry(user_id, now, retry_state):
+        return
+
+    if user_id not in jarvis_watch and user_id not in retry_state:
+        return
+
+    if ENDPOINTING == "vad":
+        finalize = should_finalize_on_vad(user_id, now, jarvis_watch, buffer, retry_state)
+    else:
+        finalize = should_finalize_buffer(user_id, now, jarvis_watch, jarvis_timeout, jarvis_hold_until, buffer, retry_state)
+
+    # 🌊 Keep decoding the utterance while it is being spoken
+    stream = get_stream(user_id, buffer)
+    if not finalize:
+        if now - last_stream_step.get(user_id, 0) >= STREAM_STEP_SECONDS:
+            last_stream_step[user_id] = now
+            await stream.step()
+        return
+
+    speech_end = vad.last_voice_time(user_id) or now
+    streams.pop(user_id, None)
+    last_stream_step.pop(user_id, None)
+    start = utterance_start(user_id, buffer)
+    wake_positions.pop(user_id, None)
+    fallback_intent = retry_state.get(user_id, {}).get("intent")
+
+    # ✅ Always clear jarvis_watch/jarvis_hold states immediately after finalizing
+    jarvis_watch.pop(user_id, None)
+    jarvis_hold_until.pop(user_id, None)
+
+    # Detaching the ring keeps the stream's view valid while new audio goes to a fresh buffer
+    pop_audio_buffer(user_id)
+    # 🎯 Table talk before "Jarvis" never reaches the final decode
+    cropped = buffer.since(start)
+    if start > buffer.written - buffer.fill:
+        print(f"✂️ Cropped {(buffer.fill - len(cropped)) / MODEL_SAMPLE_RATE:.1f}s before the wake word for {user_id}")
+    llm_trips = llm_client.count_round_trips()
+    success, speech_status = None, "silent"   # no speech left to act on, same as an empty transcript
+    decoded = False
+    if stream.passes:
+        success, speech_status = await handle_streamed_transcription(user_id, stream, fallback_intent)
+        decoded = True
+    elif len(cropped):
+        audio, removed = condition_audio(cropped, in_place=True)   # the ring is detached, so it's ours to rewrite
+        print(f"🧽 Conditioning removed {removed:.1f}s of {len(cropped) / MODEL_SAMPLE_RATE:.1f}s for {user_id}")
+        if len(audio):
+            success, speech_status = await handle_transcription(user_id, audio, fallback_intent)
+            decoded = True
+
+    if decoded:
+        command_latency.add((asyncio.get_event_loop().time() - speech_end) * 1000)
+        print(f"⏱️ Command latency ({ENDPOINTING} endpointing): {command_latency.summary()}")
+    llm_round_trips.add(llm_trips[0])
+    if llm_trips[0]:
+        print(f"🤖 {llm_trips[0]} LLM round trip(s) for {user_id}: {llm_round_trips.summary(unit='')}")
+
+    # ✅ Always clear retry_state immediately if transcription succeeded or nothing important
+    if success is None or success:
+        retry_state.pop(user_id, None)
+    else:
+        await handle_retry_logic(user_id, now, success, speech_status, retry_state, jarvis_watch, jarvis_hold_until)
+
 async def monitor_silence():
     retry_state = {}
     jarvis_watch = {}
@@ -180,65 +350,57 @@ async def monitor_silence():
     processing_users = set()
     jarvis_timeout = 4.0
 
+    async def run_user(user_id, now):
+        try:
+            await process_user(user_id, now, retry_state, jarvis_watch, jarvis_hold_until, jarvis_timeout)
+        except Exception as e:
+            print(f"⚠️ Monitor loop error for {user_id}: {e}")
+        finally:
+            processing_users.discard(user_id)
+
     while True:
         now = asyncio.get_event_loop().time()
         await check_event_trigger()
+        prune_speaker_state(((jarvis_watch.keys() | retry_state.keys()) & user_buffers.keys()) | processing_users)
 
+        # 🧵 Speakers are handled concurrently so simultaneous utterances share a Whisper batch
         for user_id in list(user_buffers.keys()):
             if user_id in processing_users:
                 continue
             processing_users.add(user_id)
+            asyncio.create_task(run_user(user_id, now))
 
-            try:
-                buffer = user_buffers.get(user_id, b"")
-                if len(buffer) < 96000:
-                    continue
-
-                # 🔍 Check for "Jarvis" (smarter now)
-                if len(buffer) >= 144000:
-                    preview = await transcribe_audio_buffer(buffer[-144000:])
-                    if preview and heard_jarvis(preview):
-                        print(f"👁️ Heard 'Jarvis' early from {user_id}, extending buffer...")
-                        jarvis_watch[user_id] = now
-                        jarvis_hold_until[user_id] = now + HOLD_BUFFER_TIME
-                        retry_state.pop(user_id, None)
-                    elif not preview.strip():
-                        print(f"👂 Ignored empty preview for {user_id}")
-
-                if should_wait_for_retry(user_id, now, retry_state):
-                    continue
-
-                if user_id not in jarvis_watch and user_id not in retry_state:
-                    continue
+        await asyncio.sleep(MONITOR_INTERVAL)
 
-                if should_finalize_buffer(user_id, now, jarvis_watch, jarvis_timeout, jarvis_hold_until, buffer, retry_state):
-                    buffer = pop_audio_buffer(user_id)
-                    if buffer:
-                        buffer = fade_in_audio(buffer)
 
-                        # ✅ Always clear jarvis_watch/jarvis_hold states immediately after finalizing
-                        jarvis_watch.pop(user_id, None)
-                        jarvis_hold_until.pop(user_id, None)
 
-                        fallback_intent = retry_state.get(user_id, {}).get("intent")
-                        success, speech_status = await handle_transcription(user_id, buffer, fallback_intent)
+async def load_wake_templates():
+    """Enrol recorded wake-word clips, falling back to TTS renderings of "Jarvis" and its aliases.
 
-                        # ✅ Always clear retry_state immediately if transcription succeeded or nothing important
-                        if success is None or success:
-                            retry_state.pop(user_id, None)
-                        else:
-                            await handle_retry_logic(user_id, now, success, speech_status, retry_state, jarvis_watch, jarvis_hold_until)
+    TTS templates only ever add early previews; Whisper previews stay on
+    until real recordings are put in WAKE_TEMPLATE_DIR.
+    """
+    from faster_whisper.audio import decode_audio
 
+    count = wake_spotter.load_template_dir(WAKE_TEMPLATE_DIR)
+    if count:
+        print(f"👂 Wake-word spotter enabled with {count} recorded template(s), Whisper only checks what it flags")
+        return
 
-            except Exception as e:
-                print(f"⚠️ Monitor loop error for {user_id}: {e}")
-
-            finally:
-                processing_users.discard(user_id)
-
-        await asyncio.sleep(1)
-
+    for alias in JARVIS_ALIASES:
+        try:
+            speech = await tts_worker.synthesize(alias.title())
+            wake_spotter.add_template(decode_audio(io.BytesIO(speech.wav), sampling_rate=MODEL_SAMPLE_RATE))
+            count += 1
+        except Exception as e:
+            print(f"⚠️ Could not synthesize a wake template for '{alias}': {e}")
 
+    if count:
+        print(f"👂 Wake-word spotter using {count} synthetic template(s) as hints, "
+              f"Whisper previews stay on until recordings are added to {WAKE_TEMPLATE_DIR}")
+    else:
+        print("👂 No wake templates, using Whisper previews for wake-word detection")
 
 async def start_transcriber_loop():
+    await load_wake_templates()
     asyncio.create_task(monitor_silence())
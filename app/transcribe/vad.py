@@ -0,0 +1,141 @@
+# app/transcribe/vad.py
+#
+# Incremental voice-activity detection per speaker. Silero VAD (ONNX) scores
+# every 32 ms of 16 kHz audio as it arrives; if the model file is missing we
+# fall back to an adaptive energy gate so endpointing still works.
+
+import os
+from collections import deque
+
+import numpy as np
+
+from app.config import SILERO_VAD_MODEL
+
+CHUNK = 512            # Silero v5 window at 16 kHz
+CONTEXT = 64           # samples of the previous window prepended to each call
+
+
+def find_silero_model(configured_path: str) -> str | None:
+    candidates = [configured_path]
+    try:
+        from faster_whisper.utils import get_assets_path
+        candidates += [os.path.join(get_assets_path(), name) for name in ("silero_vad_v5.onnx", "silero_vad.onnx")]
+    except ImportError:
+        pass
+    return next((path for path in candidates if path and os.path.exists(path)), None)
+
+
+class SileroScorer:
+    def __init__(self, path: str):
+        import onnxruntime
+
+        options = onnxruntime.SessionOptions()
+        options.inter_op_num_threads = 1
+        options.intra_op_num_threads = 1
+        self.session = onnxruntime.InferenceSession(path, sess_options=options, providers=["CPUExecutionProvider"])
+        names = {i.name for i in self.session.get_inputs()}
+        if not {"input", "state", "sr"} <= names:
+            raise ValueError(f"{path} is not a Silero v5 model (inputs: {sorted(names)})")
+        self.sr = np.array(16000, dtype=np.int64)
+
+    def new_state(self):
+        return {"state": np.zeros((2, 1, 128), dtype=np.float32), "context": np.zeros(CONTEXT, dtype=np.float32)}
+
+    def score(self, chunk: np.ndarray, state: dict) -> float:
+        window = np.concatenate((state["context"], chunk))[None, :]
+        output, state["state"] = self.session.run(None, {"input": window, "state": state["state"], "sr": self.sr})
+        state["context"] = chunk[-CONTEXT:]
+        return float(output[0][0])
+
+
+class EnergyScorer:
+    """Adaptive RMS gate: speech is anything well above the tracked noise floor."""
+
+    def new_state(self):
+        return {"floor": 1e-3}
+
+    def score(self, chunk: np.ndarray, state: dict) -> float:
+        rms = float(np.sqrt(np.mean(chunk * chunk)) + 1e-9)
+        if rms < state["floor"] * 2:
+            state["floor"] = 0.95 * state["floor"] + 0.05 * rms
+        return float(np.clip((rms / max(state["floor"], 1e-4) - 2.0) / 4.0, 0.0, 1.0))
+
+
+class _SpeakerVAD:
+    def __init__(self, scorer_state: dict):
+        self.scorer_state = scorer_state
+        self.residual = np.zeros(0, dtype=np.float32)
+        self.in_speech = False
+        self.last_voice_time = None
+        self.speech_start = None
+        self.events = deque(maxlen=32)
+
+
+class VoiceActivityDetector:
+    """Per-speaker speech-start / speech-end tracking.
+
+    Positions are in the caller's sample coordinates (the ring buffer's
+    `written`), times in event-loop seconds. Discord stops sending packets
+    when someone stops talking, so `speech_ended` is measured against the
+    clock rather than against received silent frames.
+    """
+
+    def __init__(self, model_path: str = "", start_threshold: float = 0.5, end_threshold: float = 0.35):
+        self.model_path = model_path
+        self.start_threshold = start_threshold
+        self.end_threshold = end_threshold
+        self._speakers = {}
+        self.scorer = None
+        self.backend = None
+
+    def _load_scorer(self):
+        self.scorer, self.backend = EnergyScorer(), "energy"
+        path = find_silero_model(self.model_path)
+        if path:
+            try:
+                self.scorer, self.backend = SileroScorer(path), "silero"
+            except Exception as e:
+                print(f"⚠️ Silero VAD unavailable ({e}), using energy VAD")
+        print(f"🗣️ VAD backend: {self.backend}")
+
+    def feed(self, user_id, samples: np.ndarray, position: int, now: float):
+        if self.scorer is None:
+            self._load_scorer()
+        state = self._speakers.get(user_id)
+        if state is None:
+            state = self._speakers[user_id] = _SpeakerVAD(self.scorer.new_state())
+
+        audio = np.concatenate((state.residual, samples)) if len(state.residual) else samples
+        usable = len(audio) - len(audio) % CHUNK
+        origin = position - len(audio)
+        for offset in range(0, usable, CHUNK):
+            probability = self.scorer.score(audio[offset:offset + CHUNK], state.scorer_state)
+            chunk_end = origin + offset + CHUNK
+            if probability >= self.start_threshold:
+                state.last_voice_time = now
+                if not state.in_speech:
+                    state.in_speech = True
+                    state.speech_start = chunk_end - CHUNK
+                    state.events.append(("speech_start", now, chunk_end - CHUNK))
+            elif state.in_speech and probability < self.end_threshold:
+                state.in_speech = False
+                state.events.append(("speech_end", now, chunk_end - CHUNK))
+        state.residual = audio[usable:].copy()
+
+    def last_voice_time(self, user_id) -> float | None:
+        state = self._speakers.get(user_id)
+        return state.last_voice_time if state else None
+
+    def speech_ended(self, user_id, now: float, hangover: float) -> bool:
+        """True once the speaker has been silent for `hangover` seconds after speaking."""
+        state = self._speakers.get(user_id)
+        if state is None or state.last_voice_time is None:
+            return False
+        return now - state.last_voice_time >= hangover
+
+    def events(self, user_id) -> list:
+        state = self._speakers.get(user_id)
+        return list(state.events) if state else []
+
+
+vad = VoiceActivityDetector(SILERO_VAD_MODEL)
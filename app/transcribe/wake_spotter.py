@@ -0,0 +1,280 @@
+# app/transcribe/wake_spotter.py
+#
+# Cheap "Jarvis" keyword spotter that runs on every incoming frame so Whisper
+# only has to look at audio when the wake word was probably said.
+#
+# Audio is turned into log-mel frames (25 ms window, 10 ms hop) as it
+# arrives and matched against enrolled templates with a streaming
+# subsequence DTW. Each new frame adds one column to the DTW matrix of every
+# template, so the cost per frame is constant and old audio is never revisited.
+# Ingest hands new audio over with submit(); the matching itself runs in
+# order on one worker thread, off the event loop.
+
+import glob
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from app.config import WAKE_REFRACTORY_SECONDS, WAKE_SPOTTER_THRESHOLD
+
+SAMPLE_RATE = 16000
+WIN = 400       # 25 ms
+HOP = 160       # 10 ms
+N_FFT = 512
+N_MELS = 40
+
+
+def mel_filterbank(n_mels: int = N_MELS, n_fft: int = N_FFT, sample_rate: int = SAMPLE_RATE,
+                   fmin: float = 60.0, fmax: float = 7600.0) -> np.ndarray:
+    def to_mel(f):
+        return 2595.0 * np.log10(1.0 + f / 700.0)
+
+    def to_hz(m):
+        return 700.0 * (10 ** (m / 2595.0) - 1.0)
+
+    edges = to_hz(np.linspace(to_mel(fmin), to_mel(fmax), n_mels + 2))
+    freqs = np.linspace(0, sample_rate / 2, n_fft // 2 + 1)
+    lower, center, upper = edges[:-2, None], edges[1:-1, None], edges[2:, None]
+    rising = (freqs - lower) / (center - lower)
+    falling = (upper - freqs) / (upper - center)
+    return np.maximum(0.0, np.minimum(rising, falling)).astype(np.float32)
+
+
+MEL_BANK = mel_filterbank()
+WINDOW = np.hanning(WIN).astype(np.float32)
+
+
+def log_mel(frames: np.ndarray) -> np.ndarray:
+    """(n, WIN) sample frames -> (n, N_MELS) log-mel energies."""
+    spectrum = np.abs(np.fft.rfft(frames * WINDOW, n=N_FFT)) ** 2
+    return np.log(spectrum @ MEL_BANK.T + 1e-6).astype(np.float32)
+
+
+def normalize_frames(features: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(features, axis=-1, keepdims=True)
+    return features / np.maximum(norms, 1e-6)
+
+
+def template_features(audio: np.ndarray) -> np.ndarray:
+    """Features for an enrolment clip: log-mel, utterance mean removed, unit-length frames."""
+    audio = np.asarray(audio, dtype=np.float32)
+    if len(audio) < WIN:
+        raise ValueError("template clip is shorter than one analysis window")
+    features = log_mel(sliding_window_view(audio, WIN)[::HOP])
+    return normalize_frames(features - features.mean(axis=0))
+
+
+@dataclass
+class WakeDetection:
+    score: float       # mean cosine distance along the best path (lower is better)
+    start: int         # sample positions in the caller's coordinates (see feed())
+    end: int
+
+
+class _SpeakerState:
+    def __init__(self, templates: np.ndarray):
+        k, t_max, _ = templates.shape
+        self.residual = np.zeros(0, dtype=np.float32)
+        self.mean = None
+        self.frame_index = 0
+        self.cost = np.full((k, t_max), np.inf, dtype=np.float32)
+        self.steps = np.zeros((k, t_max), dtype=np.int32)
+        self.starts = np.zeros((k, t_max), dtype=np.int64)
+        self.last_fired = -10 ** 9
+        self.detection = None
+        self.min_score = float("inf")
+
+
+class WakeWordSpotter:
+    """Streaming DTW template matcher, one state per speaker.
+
+    Without any templates the spotter is disabled and callers fall back to
+    Whisper previews. Until templates recorded from real speakers are
+    enrolled (`trusted`), detections are only hints on top of the previews;
+    once they are, Whisper only looks at audio the spotter fired on.
+    """
+
+    def __init__(self, threshold: float = 0.6, refractory_seconds: float = 1.0, mean_decay: float = 0.01,
+                 max_backlog: int = 250):
+        self.threshold = threshold
+        self.refractory_frames = int(refractory_seconds * SAMPLE_RATE / HOP)
+        self.mean_decay = mean_decay
+        self.max_backlog = max_backlog   # queued chunks (20 ms each from Discord) before new audio is dropped
+        self._templates = []
+        self._stack = None
+        self._lengths = None
+        self._speakers = {}
+        self._generations = {}   # user -> reset count, so chunks queued before a reset are skipped
+        self._lock = threading.Lock()           # match state, shared by the worker and the event loop
+        self._backlog_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="wake-spotter")
+        self.backlog = 0
+        self.recorded = 0
+        self.fired = 0
+        self.dropped = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._stack is not None
+
+    @property
+    def trusted(self) -> bool:
+        return self.recorded > 0
+
+    def add_template(self, audio: np.ndarray):
+        features = template_features(audio)
+        with self._lock:
+            self._templates.append(features)
+            t_max = max(len(t) for t in self._templates)
+            stack = np.zeros((len(self._templates), t_max, N_MELS), dtype=np.float32)
+            for i, t in enumerate(self._templates):
+                stack[i, :len(t)] = t
+            self._stack = stack
+            self._lengths = np.array([len(t) for t in self._templates])
+            self._speakers.clear()
+
+    def load_template_dir(self, path: str) -> int:
+        """Enrol every 16 kHz mono WAV in `path`. Returns how many were loaded."""
+        from faster_whisper.audio import decode_audio
+
+        count = 0
+        for filename in sorted(glob.glob(os.path.join(path, "*.wav"))):
+            try:
+                self.add_template(decode_audio(filename, sampling_rate=SAMPLE_RATE))
+                count += 1
+            except Exception as e:
+                print(f"⚠️ Skipped wake template {filename}: {e}")
+        self.recorded += count
+        return count
+
+    def reset(self, user_id):
+        """Forget a speaker's match state, e.g. when their sample counter starts over.
+
+        Chunks submitted before the reset are dropped when the worker gets to them.
+        """
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            self._speakers.pop(user_id, None)
+
+    def submit(self, user_id, samples: np.ndarray, position: int):
+        """Queue newly arrived samples for the worker thread; same arguments as feed()."""
+        if not self.enabled or len(samples) == 0:
+            return
+        if self.backlog >= self.max_backlog:
+            # The worker can't keep up: skip ahead instead of spotting ever older audio
+            self.dropped += 1
+            self.reset(user_id)
+            return
+        with self._backlog_lock:
+            self.backlog += 1
+        self._executor.submit(self._run, user_id, samples, position, self._generations.get(user_id, 0))
+
+    def _run(self, user_id, samples: np.ndarray, position: int, generation: int):
+        try:
+            with self._lock:
+                if self._generations.get(user_id, 0) == generation:
+                    self.feed(user_id, samples, position)
+        except Exception as e:
+            print(f"⚠️ Wake spotter failed on audio from {user_id}: {e}")
+        finally:
+            with self._backlog_lock:
+                self.backlog -= 1
+
+    def feed(self, user_id, samples: np.ndarray, position: int):
+        """Process newly arrived 16 kHz samples for one speaker, on the calling thread.
+
+        `position` is the caller's sample counter after these samples (the
+        ring buffer's `written`), so detections can be mapped straight back
+        onto the buffered audio.
+        """
+        if not self.enabled or len(samples) == 0:
+            return
+
+        state = self._speakers.get(user_id)
+        if state is None:
+            state = self._speakers[user_id] = _SpeakerState(self._stack)
+
+        audio = np.concatenate((state.residual, samples))
+        n_frames = max(0, (len(audio) - WIN) // HOP + 1)
+        if n_frames == 0:
+            state.residual = audio
+            return
+        features = log_mel(sliding_window_view(audio, WIN)[::HOP][:n_frames])
+        state.residual = audio[n_frames * HOP:]
+        # Sample counter value at the first sample of `audio`
+        audio_origin = position - len(audio)
+
+        for i, frame in enumerate(features):
+            if state.mean is None:
+                state.mean = frame.copy()
+            state.mean += self.mean_decay * (frame - state.mean)
+            detection = self._step(state, normalize_frames(frame - state.mean))
+            if detection is not None:
+                score, start_frame = detection
+                first_frame = state.frame_index - 1 - i   # frame index of features[0]
+                state.detection = WakeDetection(
+                    score=score,
+                    start=audio_origin + (start_frame - first_frame) * HOP,
+                    end=audio_origin + i * HOP + WIN,
+                )
+                self.fired += 1
+
+    def _step(self, state: _SpeakerState, frame: np.ndarray):
+        state.frame_index += 1
+        local = 1.0 - self._stack @ frame                      # (k, t_max)
+
+        # Predecessors from the previous column: stay on the same template
+        # frame, advance one, or skip one (stream up to 2x faster than template).
+        inf = np.full((local.shape[0], 1), np.inf, dtype=np.float32)
+        candidates = np.stack((
+            state.cost,
+            np.concatenate((inf, state.cost[:, :-1]), axis=1),
+            np.concatenate((inf, inf, state.cost[:, :-2]), axis=1),
+        ))
+        best = np.argmin(candidates, axis=0)
+        rows, cols = np.indices(best.shape)
+
+        cost = local + candidates[best, rows, cols]
+        steps = np.stack((state.steps, np.roll(state.steps, 1, axis=1), np.roll(state.steps, 2, axis=1)))[best, rows, cols] + 1
+        starts = np.stack((state.starts, np.roll(state.starts, 1, axis=1), np.roll(state.starts, 2, axis=1)))[best, rows, cols]
+
+        # Open beginning: a match may start at any frame
+        cost[:, 0] = local[:, 0]
+        steps[:, 0] = 1
+        starts[:, 0] = state.frame_index - 1
+
+        state.cost, state.steps, state.starts = cost, steps, starts
+
+        ends = self._lengths - 1
+        k = np.arange(len(ends))
+        path_steps = steps[k, ends]
+        scores = cost[k, ends] / path_steps
+        scores[path_steps > 2 * self._lengths] = np.inf       # dragged out far too long
+        best_template = int(np.argmin(scores))
+        score = float(scores[best_template])
+        state.min_score = min(state.min_score, score)
+
+        if score < self.threshold and state.frame_index - state.last_fired > self.refractory_frames:
+            state.last_fired = state.frame_index
+            return score, int(starts[best_template, ends[best_template]])
+        return None
+
+    def min_score(self, user_id) -> float:
+        """Best match score seen for this speaker so far (for offline threshold tuning)."""
+        state = self._speakers.get(user_id)
+        return state.min_score if state else float("inf")
+
+    def pop_detection(self, user_id) -> WakeDetection | None:
+        with self._lock:
+            state = self._speakers.get(user_id)
+            if state is None or state.detection is None:
+                return None
+            detection, state.detection = state.detection, None
+            return detection
+
+
+wake_spotter = WakeWordSpotter(WAKE_SPOTTER_THRESHOLD, WAKE_REFRACTORY_SECONDS)
@@ -1,28 +1,26 @@
-import tempfile
-import wave
-import psutil
-import GPUtil
-import threading
-import time
-import gc
-from faster_whisper import WhisperModel
-from app.config import DUNGEON_ALIASES
-
-# Globals
-current_model = None
-current_model_size = None
-memory_watchdog_thread = None
-
-# Model paths (cache)
-model_paths = {
-    "base.en": None,
-    "small.en": None,
-}
-
-# Smoothing window (keep track of last N memory/load values)
-gpu_mem_history = []
-gpu_load_history = []
-SMOOTH_WINDOW = 12  # 12 samples at 5s = 1 minute
+import functools
+from typing import NamedTuple
+
+import numpy as np
+from faster_whisper.audio import pad_or_trim
+from faster_whisper.tokenizer import Tokenizer
+from faster_whisper.transcribe import get_compression_ratio
+from app.config import (
+    DUNGEON_ALIASES, WHISPER_BATCH_WINDOW_MS, WHISPER_INFERENCE_WORKERS, WHISPER_MAX_BATCH,
+    WHISPER_MAX_QUEUE_DEPTH, WHISPER_MODEL_LADDER, WHISPER_P95_TARGET_MS,
+)
+from app.transcribe.batcher import MicroBatcher
+from app.transcribe.inference_service import InferenceService
+from app.transcribe.model_manager import model_manager
+from app.transcribe.model_selector import ModelSelector
+
+# Transcriptions run here, never on the event loop thread
+inference_service = InferenceService(WHISPER_INFERENCE_WORKERS, name="whisper")
+
+# Steps between models based on measured transcription latency
+model_selector = ModelSelector(
+    model_manager, inference_service, WHISPER_MODEL_LADDER, WHISPER_P95_TARGET_MS, WHISPER_MAX_QUEUE_DEPTH,
+)
 
 
 def build_initial_prompt():
@@ -31,187 +29,261 @@ def build_initial_prompt():
     return f"Ultima Online dungeons: {dungeon_list}, {static_keywords}"
 
 
-def load_model(model_size):
-    try:
-        print(f"[WhisperLoader] 🔥 Loading {model_size} model...")
-        model = WhisperModel(
-            model_size,
-            compute_type="float16"
-        )
-        model_paths[model_size] = model
-        print(f"[WhisperLoader] ✅ {model_size} loaded!")
-        return model
-    except Exception as e:
-        print(f"[WhisperLoader] ❌ Failed to load {model_size}: {e}")
-        return None
+class DecodeProfile(NamedTuple):
+    beam_size: int
+    temperature: float | tuple
+    without_timestamps: bool
+    word_timestamps: bool
+    max_new_tokens: int | None
+    prompt: str
+    condition_on_previous_text: bool
+
+    def transcribe_kwargs(self) -> dict:
+        return {
+            "beam_size": self.beam_size,
+            "best_of": self.beam_size,
+            "temperature": self.temperature,
+            "without_timestamps": self.without_timestamps,
+            "word_timestamps": self.word_timestamps,
+            "max_new_tokens": self.max_new_tokens,
+            "initial_prompt": self.prompt,
+            "condition_on_previous_text": self.condition_on_previous_text,
+        }
+
+
+# Prompts are static, so build them once
+FINAL_PROMPT = build_initial_prompt()
+PREVIEW_PROMPT = "Jarvis"
+
+DECODE_PROFILES = {
+    # Wake-word check on a 1-2 s window: greedy, one pass, a handful of tokens
+    "preview": DecodeProfile(beam_size=1, temperature=0.0, without_timestamps=True, word_timestamps=False,
+                             max_new_tokens=16, prompt=PREVIEW_PROMPT, condition_on_previous_text=False),
+    # Commands: exactly faster-whisper's defaults plus the vocabulary prompt, as before profiles existed
+    "final": DecodeProfile(beam_size=5, temperature=(0.0, 0.2, 0.4, 0.6, 0.8, 1.0), without_timestamps=False,
+                           word_timestamps=False, max_new_tokens=None, prompt=FINAL_PROMPT,
+                           condition_on_previous_text=True),
+}
 
 
-def unload_current_model():
-    global current_model
-    if current_model:
-        print(f"[WhisperLoader] 🔥 Unloading {current_model_size} model...")
-        del current_model
-        current_model = None
-        gc.collect()
+class Transcript(NamedTuple):
+    text: str
+    avg_logprob: float   # mean over decoded segments; -inf when nothing was decoded
 
 
-def preload_base_model():
-    global current_model, current_model_size
-    current_model = load_model("base.en")
-    if current_model:
-        current_model_size = "base.en"
+MIN_WORDS = 2
+MIN_CONFIDENCE = -1.0  # log probability (closer to 0 = higher confidence)
+
+def keep_segment(text: str, confidence: float) -> bool:
+    # Filter rule:
+    word_count = len(text.split())
+    if word_count >= 2 or confidence > -0.4:
+        return True
+    print(f"🧹 Ignored low-quality segment: '{text}' (confidence: {confidence:.2f})")
+    return False
+
+
+def run_transcription(model, model_size: str, audio: np.ndarray, profile: str = "final") -> Transcript:
+    """Blocking decode, run on the inference pool. Consumes the segment generator there too."""
+    segments, _ = model.transcribe(audio, **DECODE_PROFILES[profile].transcribe_kwargs())
+
+    cleaned_segments = []
+    logprobs = []
+    for segment in segments:
+        text = segment.text.strip()
+        logprobs.append(getattr(segment, "avg_logprob", 0))
+        if text and keep_segment(text, getattr(segment, "avg_logprob", 0)):
+            cleaned_segments.append(text)
+
+    transcript = " ".join(cleaned_segments).strip()
+    avg_logprob = float(np.mean(logprobs)) if logprobs else float("-inf")
+
+    # 🚨 Additional high-level check
+    if not transcript:
+        return Transcript("", avg_logprob)
+
+    print(f"[Transcription:{model_size}:{profile}] {transcript}")
+    return Transcript(transcript, avg_logprob)
+
+
+# (model_size, profile) -> (tokenizer, prompt token ids) for the batched path
+batch_prompts = {}
+
+
+def batch_prompt(model, model_size: str, profile: str):
+    key = (model_size, profile)
+    if key not in batch_prompts:
+        tokenizer = Tokenizer(model.hf_tokenizer, model.model.is_multilingual, task="transcribe", language="en")
+        prompt_tokens = tokenizer.encode(" " + DECODE_PROFILES[profile].prompt)
+        batch_prompts[key] = tokenizer, model.get_prompt(tokenizer, prompt_tokens, without_timestamps=True)
+    return batch_prompts[key]
+
+
+# faster-whisper's defaults for when WhisperModel.transcribe retries a window at a higher temperature
+FALLBACK_LOGPROB_THRESHOLD = -1.0
+FALLBACK_COMPRESSION_RATIO = 2.4
+
+
+def needs_fallback(profile: str, text: str, avg_logprob: float) -> bool:
+    """Whether a single-pass row would have been retried by the profile's temperature fallback."""
+    temperature = DECODE_PROFILES[profile].temperature
+    if not isinstance(temperature, tuple) or len(temperature) < 2:
+        return False
+    return avg_logprob < FALLBACK_LOGPROB_THRESHOLD or get_compression_ratio(text) > FALLBACK_COMPRESSION_RATIO
+
+
+def run_batch_transcription(model, model_size: str, audios: list, profile: str = "final") -> list[Transcript]:
+    """Decode several utterances (one per speaker) in a single batched pass.
+
+    Each utterance of up to one 30 s window becomes one row of the encoder
+    batch and is decoded as a single segment. This goes through the same
+    CTranslate2 calls that WhisperModel.transcribe uses, but several speakers
+    share one encoder and decoder pass instead of queueing behind each other.
+    Rows are decoded once, without timestamps or temperature fallback. A row
+    that WhisperModel.transcribe would have retried (low avg_logprob or
+    repetitive text) is decoded again on its own with the full profile, so
+    accuracy doesn't depend on who else finished in the same window. Longer
+    utterances always take the single-item path instead of being cut at 30 s.
+    """
+    batchable = [i for i, audio in enumerate(audios) if len(audio) <= model.feature_extractor.n_samples]
+    if len(batchable) < 2:
+        return [run_transcription(model, model_size, audio, profile) for audio in audios]
+
+    settings = DECODE_PROFILES[profile]
+    tokenizer, prompt = batch_prompt(model, model_size, profile)
+    max_length = model.max_length
+    if settings.max_new_tokens:
+        max_length = min(max_length, len(prompt) + settings.max_new_tokens)
+
+    features = np.stack([pad_or_trim(model.feature_extractor(audios[i])[..., :-1]) for i in batchable])
+    encoder_output = model.encode(features)
+    results = model.model.generate(
+        encoder_output,
+        [prompt] * len(batchable),
+        beam_size=settings.beam_size,
+        max_length=max_length,
+        suppress_blank=True,
+        suppress_tokens=[-1],
+        return_scores=True,
+        return_no_speech_prob=True,
+    )
+
+    transcripts = [None] * len(audios)
+    for i, result in zip(batchable, results):
+        tokens = result.sequences_ids[0]
+        text = tokenizer.decode(tokens).strip()
+        avg_logprob = result.scores[0] * len(tokens) / (len(tokens) + 1)
+        if result.no_speech_prob > 0.6 and avg_logprob < -1.0:
+            text = ""
+        elif needs_fallback(profile, text, avg_logprob):
+            print(f"[Transcription:{model_size}:{profile}:batch{len(batchable)}] 🔁 Row {i} unclear "
+                  f"(avg_logprob {avg_logprob:.2f}), decoding it again with temperature fallback")
+            continue
+        if text and keep_segment(text, avg_logprob):
+            print(f"[Transcription:{model_size}:{profile}:batch{len(batchable)}] {text}")
+            transcripts[i] = Transcript(text, avg_logprob)
+        else:
+            transcripts[i] = Transcript("", avg_logprob)
+
+    # Rows that need the fallback and utterances longer than one window
+    return [transcript if transcript is not None else run_transcription(model, model_size, audio, profile)
+            for transcript, audio in zip(transcripts, audios)]
+
+
+async def decode_batch(audios: list, model_size: str | None = None, profile: str = "final") -> list[Transcript]:
+    if model_size is None:
+        model, model_size = await model_manager.acquire_async()
     else:
-        print("[WhisperLoader] 🚨 FATAL: Could not preload base.en. Exiting.")
+        model = await model_manager.model_async(model_size)
+    if model is None:
+        print("❌ No Whisper model loaded.")
+        return [Transcript("", float("-inf"))] * len(audios)
+    return await inference_service.run(run_batch_transcription, model, model_size, audios, profile)
 
 
-def get_gpu_memory_percent():
-    try:
-        gpus = GPUtil.getGPUs()
-        if not gpus:
-            return 0
-        gpu = gpus[0]
-        return (gpu.memoryUsed / gpu.memoryTotal) * 100
-    except Exception as e:
-        print(f"[MemoryWatchdog] ⚠️ Failed to read GPU memory: {e}")
-        return 0
+# Utterances from speakers who finish within a few tens of ms are decoded together.
+# One batcher per (model, profile); a None model follows whichever model is active.
+batchers = {}
 
 
-def get_gpu_load_percent():
-    try:
-        gpus = GPUtil.getGPUs()
-        if not gpus:
-            return 0
-        gpu = gpus[0]
-        return gpu.load * 100
-    except Exception as e:
-        print(f"[MemoryWatchdog] ⚠️ Failed to read GPU load: {e}")
-        return 0
-
+def get_batcher(model_size: str | None = None, profile: str = "final") -> MicroBatcher:
+    key = (model_size, profile)
+    if key not in batchers:
+        batchers[key] = MicroBatcher(
+            functools.partial(decode_batch, model_size=model_size, profile=profile),
+            WHISPER_BATCH_WINDOW_MS, WHISPER_MAX_BATCH,
+        )
+    return batchers[key]
 
-def memory_watchdog(threshold_high=85, threshold_low=50):
-    global current_model, current_model_size
-    global gpu_mem_history, gpu_load_history
 
-    print("[MemoryWatchdog] 🚀 Watchdog started, monitoring GPU memory and load...")
+async def transcribe(audio: np.ndarray, model_size: str | None = None, profile: str = "final") -> Transcript:
+    """Transcribe with a specific model, or with the active one when `model_size` is None.
 
-    while True:
-        gpu_mem = get_gpu_memory_percent()
-        gpu_load = get_gpu_load_percent()
+    `profile` names an entry in DECODE_PROFILES: "preview" for cheap wake-word
+    checks, "final" for commands.
+    """
+    active_size = model_manager.active_size if model_size is None else model_size
 
-        gpu_mem_history.append(gpu_mem)
-        gpu_load_history.append(gpu_load)
+    # 16 kHz mono float32 goes straight to the model: no WAV file, no ffmpeg decode
+    audio = np.ascontiguousarray(audio, dtype=np.float32)
+    try:
+        # Latency for the model selector is measured per utterance by the cascade, not per decode
+        return await get_batcher(model_size, profile).submit(audio)
 
-        if len(gpu_mem_history) > SMOOTH_WINDOW:
-            gpu_mem_history.pop(0)
-        if len(gpu_load_history) > SMOOTH_WINDOW:
-            gpu_load_history.pop(0)
+    except Exception as e:
+        print(f"❌ Whisper error while using {active_size}: {e}")
+        if model_size is None:
+            # Retry on the next rung of the selector's ladder, or on whatever another caller already moved to
+            if model_manager.active_size != active_size or await model_selector.fall_back(f"Whisper error on {active_size}"):
+                return await transcribe(audio, profile=profile)
+        return Transcript("", float("-inf"))
 
-        avg_gpu_mem = sum(gpu_mem_history) / len(gpu_mem_history)
-        avg_gpu_load = sum(gpu_load_history) / len(gpu_load_history)
 
-        print(f"[MemoryWatchdog] 📊 GPU Mem: {avg_gpu_mem:.1f}%, GPU Load: {avg_gpu_load:.1f}% (avg {len(gpu_mem_history)} samples)")
+async def transcribe_audio_buffer(audio: np.ndarray, profile: str = "final") -> str:
+    return (await transcribe(audio, profile=profile)).text
 
-        # Downgrade if high GPU load
-        if (avg_gpu_load >= threshold_high):
-            if current_model_size == "base.en":
-                print("⚡ High GPU load detected, downgrading to small.en")
-                unload_current_model()
-                current_model = model_paths.get("small.en") or load_model("small.en")
-                current_model_size = "small.en"
 
-        # Upgrade if low
-        if (avg_gpu_mem <= threshold_low and avg_gpu_load <= threshold_low):
-            if current_model_size == "small.en":
-                print("🚀 Upgrading back to base.en (GPU load normal)")
-                unload_current_model()
-                current_model = model_paths.get("base.en") or load_model("base.en")
-                current_model_size = "base.en"
+def run_word_transcription(model, audio: np.ndarray, context: str) -> list:
+    """Blocking "final"-profile decode with word timestamps: [(word, start_s, end_s), ...]."""
+    options = DECODE_PROFILES["final"].transcribe_kwargs()
+    options["word_timestamps"] = True
+    if context:
+        options["initial_prompt"] = f"{FINAL_PROMPT}. {context}"
+    segments, _ = model.transcribe(audio, **options)
 
-        time.sleep(5)
+    words = []
+    for segment in segments:
+        text = segment.text.strip()
+        if text and keep_segment(text, getattr(segment, "avg_logprob", 0)):
+            words.extend((w.word.strip(), w.start, w.end) for w in segment.words or [] if w.word.strip())
+    return words
 
 
-def start_memory_watchdog(threshold_high=85, threshold_low=50):
-    global memory_watchdog_thread
-    if memory_watchdog_thread is None:
-        memory_watchdog_thread = threading.Thread(target=memory_watchdog, args=(threshold_high, threshold_low), daemon=True)
-        memory_watchdog_thread.start()
+async def transcribe_words(audio: np.ndarray, context: str = "", model_size: str | None = None) -> list:
+    """Word-timestamped transcription for the streaming transcriber. `context` is already-committed text.
 
+    Uses `model_size`, or the active model when it is None.
+    """
+    if model_size is None:
+        model, _ = await model_manager.acquire_async()
+    else:
+        model = await model_manager.model_async(model_size)
+    if model is None:
+        print("❌ No Whisper model loaded.")
+        return []
+    audio = np.ascontiguousarray(audio, dtype=np.float32)
+    try:
+        return await inference_service.run(run_word_transcription, model, audio, context)
+    except Exception as e:
+        print(f"❌ Whisper streaming pass failed: {e}")
+        return []
 
-# PCM to WAV
 
-def save_pcm_to_wav(pcm_data: bytes, filename: str, rate: int = 48000):
-    with wave.open(filename, "wb") as wf:
-        wf.setnchannels(1)
-        wf.setsampwidth(2)
-        wf.setframerate(rate)
-        wf.writeframes(pcm_data)
+async def force_use_base_model():
+    if await model_manager.switch_async("base.en"):
+        print("🛠️ Manually switched to base.en")
 
-MIN_WORDS = 2
-MIN_CONFIDENCE = -1.0  # log probability (closer to 0 = higher confidence)
 
-async def transcribe_audio_buffer(pcm_data: bytes) -> str:
-    global current_model, current_model_size
-    if current_model is None:
-        print("❌ No Whisper model loaded.")
-        return ""
-
-    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_wav:
-        save_pcm_to_wav(pcm_data, temp_wav.name)
-        try:
-            initial_prompt = build_initial_prompt()
-            segments, _ = current_model.transcribe(temp_wav.name, initial_prompt=initial_prompt)
-
-            cleaned_segments = []
-            for segment in segments:
-                text = segment.text.strip()
-                if not text:
-                    continue
-
-                confidence = getattr(segment, "avg_logprob", 0)
-
-                # Filter rule:
-                word_count = len(text.split())
-                if word_count >= 2 or confidence > -0.4:
-                    cleaned_segments.append(text)
-                else:
-                    print(f"🧹 Ignored low-quality segment: '{text}' (confidence: {confidence:.2f})")
-
-            transcript = " ".join(cleaned_segments).strip()
-
-            # 🚨 Additional high-level check
-            if not transcript:
-                return ""
-
-            print(f"[Transcription:{current_model_size}] {transcript}")
-            return transcript
-
-        except Exception as e:
-            print(f"❌ Whisper error while using {current_model_size}: {e}")
-            if current_model_size == "base.en":
-                print("⚡ Downgrading to small.en due to transcription error.")
-                unload_current_model()
-                current_model = model_paths.get("small.en") or load_model("small.en")
-                current_model_size = "small.en"
-                return await transcribe_audio_buffer(pcm_data)
-            return ""
-
-
-def force_use_base_model():
-    global current_model, current_model_size
-    unload_current_model()
-    current_model = model_paths.get("base.en") or load_model("base.en")
-    current_model_size = "base.en"
-    print("🛠️ Manually switched to base.en")
-
-
-def force_use_small_model():
-    global current_model, current_model_size
-    unload_current_model()
-    current_model = model_paths.get("small.en") or load_model("small.en")
-    current_model_size = "small.en"
-    print("🛠️ Manually switched to small.en")
-
-
-# --- Initialize everything at startup ---
-preload_base_model()
-start_memory_watchdog()
+async def force_use_small_model():
+    if await model_manager.switch_async("small.en"):
+        print("🛠️ Manually switched to small.en")
@@ -1,10 +1,11 @@
 
 from datetime import datetime
-import difflib
 import re
 
 from app.ai.dungeon_llm import extract_dungeon_with_llm
+from app.ai.extraction import NOT_ASKED
 from app.config import COMMON_MISHEARINGS, FLATTENED_DUNGEONS, ORDINAL_LEVELS
+from app.utils.vocab_index import VocabularyIndex, dungeon_index
 
 
 # Build flat lookup
@@ -12,6 +13,7 @@ MISHEARING_LOOKUP = {}
 for correct_word, wrongs in COMMON_MISHEARINGS.items():
     for wrong in wrongs:
         MISHEARING_LOOKUP[wrong] = correct_word
+MISHEARING_INDEX = VocabularyIndex(MISHEARING_LOOKUP)
 
 def log_correction(original: str, corrected: str, score: float):
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -23,8 +25,6 @@ def fuzzy_autocorrect(text: str) -> str:
     words = re.findall(r'\b[a-zA-Z]+\b', text)
     corrected_words = []
 
-    all_mishears = list(MISHEARING_LOOKUP.keys())
-
     for word in words:
         # ✅ Exact match
         if word in MISHEARING_LOOKUP:
@@ -32,10 +32,10 @@ def fuzzy_autocorrect(text: str) -> str:
             continue
 
         # 🔍 Fuzzy fallback
-        close = difflib.get_close_matches(word, all_mishears, n=1, cutoff=0.75)
+        close = MISHEARING_INDEX.best_match(word, 0.75)
         if close:
-            corrected = MISHEARING_LOOKUP[close[0]]
-            score = difflib.SequenceMatcher(None, word, close[0]).ratio()
+            corrected = MISHEARING_LOOKUP[close]
+            score = VocabularyIndex.score(word, close)
             corrected_words.append(corrected)
             log_correction(word, corrected, score)
         else:
@@ -51,19 +51,18 @@ def extract_dungeon_and_level(text: str):
     joined = " ".join(words)
 
     matched_dungeon = None
-    all_aliases = list(FLATTENED_DUNGEONS.keys())
 
     # 🔥 Try full sentence match first (stricter)
-    close = difflib.get_close_matches(joined, all_aliases, n=1, cutoff=0.75)
+    close = dungeon_index.best_match(joined, 0.75)
     if close:
-        matched_dungeon = FLATTENED_DUNGEONS[close[0]]
+        matched_dungeon = FLATTENED_DUNGEONS[close]
 
     # 🔥 If no full match, fallback to per-word
     if not matched_dungeon:
         for word in words:
-            close = difflib.get_close_matches(word, all_aliases, n=1, cutoff=0.8)
+            close = dungeon_index.best_match(word, 0.8)
             if close:
-                matched_dungeon = FLATTENED_DUNGEONS[close[0]]
+                matched_dungeon = FLATTENED_DUNGEONS[close]
                 break
 
     # Parse level
@@ -82,10 +81,10 @@ def extract_dungeon_and_level(text: str):
 
     return None, None
 
-async def get_dungeon_from_text(text: str) -> tuple[str, str] | None:
+async def get_dungeon_from_text(text: str, extraction=NOT_ASKED) -> tuple[str, str] | None:
     corrected_text = fuzzy_autocorrect(text)
     dungeon, level = extract_dungeon_and_level(corrected_text)
     if dungeon and level:
         return dungeon, level
 
-    return await extract_dungeon_with_llm(text)
\ No newline at end of file
+    return await extract_dungeon_with_llm(text, extraction)
\ No newline at end of file
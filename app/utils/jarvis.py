@@ -1,18 +1,19 @@
-import difflib
 import re
 
+from app.utils.vocab_index import VocabularyIndex
+
 
 JARVIS_ALIASES = [
     "jarvis", "garvis", "jarvus", "jarviz", "darvis", "garves", "jervis", "jarbis", "jarviss", "charvis"
 ]
+JARVIS_INDEX = VocabularyIndex(JARVIS_ALIASES)
 
 
 def heard_jarvis(text: str) -> bool:
     """Fuzzy detect if Jarvis was probably mentioned."""
     words = re.findall(r"[a-zA-Z]+", text.lower())
     for word in words:
-        matches = difflib.get_close_matches(word, JARVIS_ALIASES, n=1, cutoff=0.7)
-        if matches:
+        if JARVIS_INDEX.best_match(word, 0.7):
             return True
     return False
 
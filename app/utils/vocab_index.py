@@ -0,0 +1,100 @@
+# app/utils/vocab_index.py
+#
+# Precompiled fuzzy lookup for the bot's small vocabularies (dungeon aliases,
+# mishearings, intent keywords, wake-word aliases, event names).
+#
+# Results are exactly those of difflib.get_close_matches(query, vocabulary,
+# n=1, cutoff): the same SequenceMatcher ratio in the same orientation, the
+# same tie-breaking. The speed comes from never scoring hopeless candidates:
+# they are pruned by length first, then by shared characters (the bounds
+# difflib itself uses as real_quick_ratio/quick_ratio), and every query
+# result is memoized.
+
+from collections import Counter
+from difflib import SequenceMatcher
+
+from app.config import FLATTENED_DUNGEONS
+
+MEMO_SIZE = 4096
+
+
+class VocabularyIndex:
+    """Fuzzy matcher over a fixed vocabulary.
+
+    `entries` is a list of strings, or a dict whose keys are matched and
+    whose values are returned by `lookup`.
+    """
+
+    def __init__(self, entries):
+        self.values = dict(entries) if isinstance(entries, dict) else {entry: entry for entry in entries}
+        self.vocabulary = list(self.values)
+        self._by_length = {}
+        for position, entry in enumerate(self.vocabulary):
+            self._by_length.setdefault(len(entry), []).append((position, entry, Counter(entry)))
+        self._memo = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __contains__(self, key) -> bool:
+        return key in self.values
+
+    def lookup(self, key, default=None):
+        return self.values.get(key, default)
+
+    def _candidates(self, query: str, cutoff: float):
+        """(entry, exact ratio) for every entry that scores >= cutoff against `query`."""
+        query_length = len(query)
+        query_counts = None
+        for length, bucket in self._by_length.items():
+            total = length + query_length
+            # real_quick_ratio: at best every character of the shorter string matches
+            if total and 2.0 * min(length, query_length) / total < cutoff:
+                continue
+            if query_counts is None:
+                query_counts = Counter(query)
+            for position, entry, counts in bucket:
+                # quick_ratio: at best every shared character matches
+                if total and 2.0 * sum((counts & query_counts).values()) / total < cutoff:
+                    continue
+                yield position, entry
+
+    def matches(self, query: str, cutoff: float, query_first: bool = False) -> list:
+        """All (ratio, entry) pairs scoring >= cutoff, in vocabulary order.
+
+        difflib scores SequenceMatcher(None, entry, query), and ratio() is not
+        quite symmetric. `query_first` scores SequenceMatcher(None, query, entry)
+        instead, for call sites that looked up a vocabulary word among the words
+        of a transcript.
+        """
+        key = (query, cutoff, query_first)
+        cached = self._memo.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        self.misses += 1
+
+        found = []
+        for position, entry in self._candidates(query, cutoff):
+            a, b = (query, entry) if query_first else (entry, query)
+            ratio = SequenceMatcher(None, a, b).ratio()
+            if ratio >= cutoff:
+                found.append((position, ratio, entry))
+        result = [(ratio, entry) for _, ratio, entry in sorted(found)]
+
+        if len(self._memo) >= MEMO_SIZE:
+            self._memo.clear()
+        self._memo[key] = result
+        return result
+
+    def best_match(self, query: str, cutoff: float) -> str | None:
+        """Same as difflib.get_close_matches(query, vocabulary, n=1, cutoff=cutoff), or None."""
+        found = self.matches(query, cutoff)
+        return max(found)[1] if found else None
+
+    @staticmethod
+    def score(a: str, b: str) -> float:
+        return SequenceMatcher(None, a, b).ratio()
+
+
+# Shared by the rule-based extractor and the LLM post-processing
+dungeon_index = VocabularyIndex(FLATTENED_DUNGEONS)
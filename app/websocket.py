@@ -3,63 +3,186 @@ import asyncio
 import base64
 import json
 import websockets
-import os
-import pyttsx3
+import numpy as np
+
+from app.config import (
+    AUDIO_MEMORY_BUDGET_MB, MAX_BUFFER_SECONDS, MODEL_SAMPLE_RATE, TTS_CACHE_SIZE,
+    WS_OUTBOUND_QUEUE_SIZE, WS_SEND_TIMEOUT, WS_SLOW_CLIENT_POLICY,
+)
+from app.shared.audio_protocol import (
+    AUDIO_SUBPROTOCOL, FORMAT_OGG_OPUS, JSON_SUBPROTOCOL, KIND_SPEAK, ProtocolError, decode_message, encode_message,
+)
+from app.shared.outbound_queue import ClientWriter
+from app.shared.resample import Decimator
+from app.shared.ring_buffer import AudioRingBuffer
+from app.shared.tts_worker import TTSWorker
+from app.transcribe.vad import vad
+from app.transcribe.wake_spotter import wake_spotter
 
 user_buffers = {}
+user_resamplers = {}
 last_spoke = {}
-ws_clients = set()
+last_seq = {}
+dropped_frames = {}
+evicted_buffers = {}
+retired_counters = {}   # user -> [samples written, samples overflowed] by rings already dropped
+ws_clients = {}      # websocket -> ClientWriter
+speaker_owner = {}   # speaker -> websocket of the listener in their voice channel
+reply_seq = {}
 
-# Initialize TTS engine
-tts_engine = pyttsx3.init()
+# TTS runs on its own thread so synthesis never blocks the event loop
+tts_worker = TTSWorker(TTS_CACHE_SIZE)
 
-def synthesize_response(text, filename="jarvis.wav"):
-    tts_engine.save_to_file(text, filename)
-    tts_engine.runAndWait()
-    return filename
+def build_speak_message(user, speech, binary):
+    """Binary Ogg Opus for clients on the audio protocol, base64 WAV JSON otherwise."""
+    if binary and speech.opus:
+        seq = reply_seq[user] = reply_seq.get(user, -1) + 1
+        return encode_message([(user, seq, speech.opus)], kind=KIND_SPEAK, sample_format=FORMAT_OGG_OPUS)
+    return json.dumps({
+        "type": "speak",
+        "user": user,
+        "audio": base64.b64encode(speech.wav).decode("utf-8"),
+        "format": "wav"
+    })
 
 async def send_speak_command(user, text):
     print(f"🟢 Wake word detected from {user}! ✅")
-    filepath = synthesize_response(text)
-    if os.path.exists(filepath):
-        with open(filepath, "rb") as f:
-            b64_audio = base64.b64encode(f.read()).decode("utf-8")
-        message = json.dumps({
-            "type": "speak",
-            "user": user,
-            "audio": b64_audio,
-            "format": "wav"
-        })
-        for client in ws_clients:
-            await client.send(message)
+    speech = await tts_worker.synthesize(text)
+    if speech:
+        for writer in listeners_for(user):
+            binary = writer.websocket.subprotocol == AUDIO_SUBPROTOCOL
+            writer.enqueue(build_speak_message(user, speech, binary))
+
+def listeners_for(user):
+    """The listener that owns the speaker's voice channel, or every listener if unknown."""
+    writer = ws_clients.get(speaker_owner.get(user))
+    if writer:
+        return [writer]
+    print(f"⚠️ No listener known for {user}, broadcasting reply")
+    return list(ws_clients.values())
+
+def evict_idle_buffers(needed_bytes):
+    """Drop the longest-idle speakers' audio until `needed_bytes` fits in the budget."""
+    budget = AUDIO_MEMORY_BUDGET_MB * 1024 * 1024
+    in_use = sum(buf.nbytes for buf in user_buffers.values())
+    while user_buffers and in_use + needed_bytes > budget:
+        idle_user = min(user_buffers, key=lambda uid: last_spoke.get(uid, 0))
+        buffer = user_buffers.pop(idle_user)
+        retire_buffer(idle_user, buffer)
+        wake_spotter.reset(idle_user)
+        in_use -= buffer.nbytes
+        evicted_buffers[idle_user] = evicted_buffers.get(idle_user, 0) + 1
+        print(f"⚠️ Audio memory budget reached, dropped buffered audio for {idle_user}")
+
+def retire_buffer(user_id, buffer):
+    """Fold a dropped ring's counters into the speaker's running totals."""
+    totals = retired_counters.setdefault(user_id, [0, 0])
+    totals[0] += buffer.written
+    totals[1] += buffer.overflowed
+
+def get_speaker_buffer(user_id):
+    buffer = user_buffers.get(user_id)
+    if buffer is None:
+        evict_idle_buffers(AudioRingBuffer.bytes_for(MAX_BUFFER_SECONDS, MODEL_SAMPLE_RATE, np.float32))
+        buffer = user_buffers[user_id] = AudioRingBuffer(MAX_BUFFER_SECONDS, MODEL_SAMPLE_RATE, np.float32)
+    return buffer
 
 def add_audio_chunk(user_id, audio_bytes):
-    if user_id not in user_buffers:
-        user_buffers[user_id] = bytearray()
-    user_buffers[user_id].extend(audio_bytes)
-    last_spoke[user_id] = asyncio.get_event_loop().time()
+    """Store 48 kHz int16 PCM as 16 kHz float32, resampled once at ingest."""
+    resampler = user_resamplers.get(user_id)
+    if resampler is None:
+        resampler = user_resamplers[user_id] = Decimator(48000, MODEL_SAMPLE_RATE)
+    samples = resampler.process(audio_bytes)
+    buffer = get_speaker_buffer(user_id)
+    buffer.write(samples)
+    now = asyncio.get_event_loop().time()
+    wake_spotter.submit(user_id, samples, buffer.written)   # matched on the spotter's own thread
+    vad.feed(user_id, samples, buffer.written, now)
+    last_spoke[user_id] = now
 
 def pop_audio_buffer(user_id):
-    return user_buffers.pop(user_id, None)
+    """Detach the speaker's buffer and return a view of its audio.
+
+    The ring is removed from `user_buffers`, so new audio goes into a fresh
+    buffer and the returned view stays valid while it is being transcribed.
+    """
+    buffer = user_buffers.pop(user_id, None)
+    if buffer is None:
+        return None
+    retire_buffer(user_id, buffer)
+    # The next ring counts samples from 0 again, so spotter positions must too
+    wake_spotter.reset(user_id)
+    return buffer.view()
+
+def buffer_stats():
+    """Per-speaker fill of the current ring and overflow counters since startup."""
+    stats = {}
+    for user_id in user_buffers.keys() | retired_counters.keys():
+        buf = user_buffers.get(user_id)
+        written, overflowed = retired_counters.get(user_id, (0, 0))
+        stats[user_id] = {
+            "seconds": round(buf.duration, 2) if buf else 0.0,
+            "fill": buf.fill if buf else 0,
+            "capacity": buf.capacity if buf else 0,
+            "written": written + (buf.written if buf else 0),
+            "overflowed": overflowed + (buf.overflowed if buf else 0),
+            "dropped_frames": dropped_frames.get(user_id, 0),
+            "evicted": evicted_buffers.get(user_id, 0),
+        }
+    return stats
+
+def track_sequence(user_id, seq):
+    """Count frames lost between two binary messages from the same speaker."""
+    previous = last_seq.get(user_id)
+    if previous is not None:
+        gap = (seq - previous - 1) & 0xFFFFFFFF
+        if 0 < gap < 0x80000000:
+            dropped_frames[user_id] = dropped_frames.get(user_id, 0) + gap
+            print(f"⚠️ {user_id}: {gap} audio frame(s) missing before seq {seq}")
+    last_seq[user_id] = seq
+
+def handle_binary_message(websocket, message):
+    for speaker_name, seq, _sample_format, payload in decode_message(message):
+        track_sequence(speaker_name, seq)
+        speaker_owner[speaker_name] = websocket
+        add_audio_chunk(speaker_name, payload)
+
+def handle_json_message(websocket, message):
+    data = json.loads(message)
+    audio_bytes = base64.b64decode(data["audio"])
+    speaker_name = data["user"]
+    speaker_owner[speaker_name] = websocket
+    add_audio_chunk(speaker_name, audio_bytes)
 
 async def handle_ws_connection(websocket):
-    print("🔌 WebSocket client connected")
-    ws_clients.add(websocket)
+    protocol = websocket.subprotocol or JSON_SUBPROTOCOL
+    print(f"🔌 WebSocket client connected ({protocol})")
+    writer = ClientWriter(websocket, WS_OUTBOUND_QUEUE_SIZE, WS_SLOW_CLIENT_POLICY, WS_SEND_TIMEOUT,
+                          on_close=lambda: ws_clients.pop(websocket, None)).start()
+    ws_clients[websocket] = writer
     try:
         async for message in websocket:
             try:
-                data = json.loads(message)
-                audio_bytes = base64.b64decode(data["audio"])
-                speaker_name = data["user"]
-                add_audio_chunk(speaker_name, audio_bytes)
+                if isinstance(message, bytes):
+                    handle_binary_message(websocket, message)
+                else:
+                    handle_json_message(websocket, message)
+            except ProtocolError as e:
+                print(f"⚠️ Dropped malformed audio message: {e}")
             except Exception as e:
                 print(f"⚠️ Error in WebSocket callback: {e}")
     except websockets.exceptions.ConnectionClosed:
         print("❌ WebSocket client disconnected")
     finally:
-        ws_clients.discard(websocket)
+        writer.close()
+        ws_clients.pop(websocket, None)
+        for speaker in [s for s, ws in speaker_owner.items() if ws is websocket]:
+            speaker_owner.pop(speaker, None)
 
 async def start_ws_server():
-    server = await websockets.serve(handle_ws_connection, "localhost", 8765)
+    server = await websockets.serve(
+        handle_ws_connection, "localhost", 8765,
+        subprotocols=[AUDIO_SUBPROTOCOL, JSON_SUBPROTOCOL],
+    )
     print("🌐 WebSocket server started on ws://localhost:8765")
     return server
\ No newline at end of file
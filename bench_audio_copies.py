@@ -0,0 +1,79 @@
+"""Check with tracemalloc that no stage of the audio path copies a whole utterance.
+
+Feeds a synthetic utterance through the same steps the bot uses (48 kHz
+int16 frames -> Decimator -> ring buffer -> crop -> conditioning -> model
+input) and reports the peak of new allocations for each stage against the
+size of the utterance. Exits non-zero if any stage allocates a full copy.
+
+Usage: python bench_audio_copies.py [seconds]
+"""
+import sys
+import tracemalloc
+
+import numpy as np
+
+from app.shared.resample import Decimator
+from app.shared.ring_buffer import AudioRingBuffer
+from app.transcribe.conditioning import condition_audio
+
+seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 10.0
+FRAME = 960  # 20 ms at 48 kHz, one Discord packet
+
+# Speech bursts separated by silence, as 48 kHz int16 PCM
+t = np.arange(int(seconds * 48000)) / 48000
+envelope = (np.sin(2 * np.pi * 0.4 * t) > 0).astype(np.float32)
+pcm = (0.3 * 32767 * envelope * np.sin(2 * np.pi * 220 * t)).astype(np.int16).tobytes()
+frames = [memoryview(pcm)[i:i + FRAME * 2] for i in range(0, len(pcm), FRAME * 2)]
+
+decimator = Decimator(48000, 16000)
+ring = AudioRingBuffer(30, sample_rate=16000, dtype=np.float32)
+utterance_bytes = int(seconds * 16000) * 4
+limit = utterance_bytes // 4   # anything this big is a copy of a large part of the utterance
+failed = False
+
+
+def measure(name, fn):
+    global failed
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    result = fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    ok = peak < limit
+    failed |= not ok
+    print(f"{'✅' if ok else '❌'} {name:<12} peak {peak / 1024:8.1f} KiB  ({peak / utterance_bytes:5.1%} of utterance)")
+    return result
+
+
+def ingest():
+    for frame in frames:
+        ring.write(decimator.process(frame))
+
+
+# One throwaway pass so one-off interpreter/NumPy allocations aren't counted as copies
+warm_ring = AudioRingBuffer(30, sample_rate=16000, dtype=np.float32)
+warm_decimator = Decimator(48000, 16000)
+for i in range(1000):
+    warm_ring.write(warm_decimator.process(frames[i % len(frames)]))
+condition_audio(warm_ring.view(), in_place=True)
+del warm_ring
+
+
+def preview():
+    return np.ascontiguousarray(ring.latest(1.5), dtype=np.float32)
+
+
+def finalize():
+    cropped = ring.since(ring.written - ring.fill)
+    audio, removed = condition_audio(cropped, in_place=True)
+    model_input = np.ascontiguousarray(audio, dtype=np.float32)
+    assert np.shares_memory(model_input, ring.view())
+    return removed
+
+
+print(f"🎧 {seconds:.1f}s utterance = {utterance_bytes / 1024:.0f} KiB of 16 kHz float32")
+measure("ingest", ingest)
+measure("preview", preview)
+removed = measure("finalize", finalize)
+print(f"🧽 conditioning removed {removed:.1f}s")
+sys.exit(1 if failed else 0)
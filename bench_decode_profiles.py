@@ -0,0 +1,40 @@
+"""Compare the "preview" and "final" decode profiles on a wake-word sized clip.
+
+Usage: python bench_decode_profiles.py [clip.wav] [model_size] [runs]
+"""
+import sys
+import time
+
+import numpy as np
+from faster_whisper import WhisperModel
+from faster_whisper.audio import decode_audio
+
+from app.transcribe.whisper_modal import DECODE_PROFILES
+
+clip = sys.argv[1] if len(sys.argv) > 1 else None
+model_size = sys.argv[2] if len(sys.argv) > 2 else "base.en"
+runs = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+
+if clip:
+    audio = decode_audio(clip, sampling_rate=16000)
+else:
+    t = np.arange(int(16000 * 1.5)) / 16000
+    audio = (0.1 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+model = WhisperModel(model_size, compute_type="int8")
+
+
+def decode(profile):
+    segments, _ = model.transcribe(audio, **DECODE_PROFILES[profile].transcribe_kwargs())
+    return " ".join(s.text.strip() for s in segments)
+
+
+print(f"🎧 {len(audio) / 16000:.1f}s clip, {model_size}, {runs} runs")
+for profile in DECODE_PROFILES:
+    text = decode(profile)  # warm-up
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        decode(profile)
+        samples.append((time.perf_counter() - start) * 1000)
+    print(f"{profile:<8}: p50 {np.median(samples):7.1f} ms  p95 {np.percentile(samples, 95):7.1f} ms  '{text}'")
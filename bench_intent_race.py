@@ -0,0 +1,84 @@
+"""Compare command latency with and without speculative LLM intent detection on streamed utterances.
+
+Needs a running Ollama with LLM_MODEL pulled. For each (committed words,
+final transcript) pair, the tail decode is stood in for by a sleep of
+`tail_ms`, which is what the speculative request overlaps with:
+
+  sequential : tail decode, then detect_high_level_intent(final)
+  speculative: speculate_intent(committed), tail decode, then detect_high_level_intent(final, speculation)
+
+The LLM result cache is cleared before every run so each one pays the real round trip.
+
+Usage: python bench_intent_race.py [pairs.tsv] [tail_ms] [repeats]
+       (one "committed<TAB>final" pair per line; a built-in set is used if omitted)
+"""
+import asyncio
+import sys
+import time
+
+from app.ai.llm_cache import llm_cache
+from app.ai.llm_client import llm_client
+from app.shared.metrics import RollingStats
+from app.transcribe.intent import detect_high_level_intent, speculate_intent
+
+pairs_path = sys.argv[1] if len(sys.argv) > 1 else None
+tail_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 400.0
+repeats = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+
+if pairs_path:
+    with open(pairs_path, encoding="utf-8") as f:
+        pairs = [tuple(line.rstrip("\n").split("\t", 1)) for line in f if "\t" in line]
+else:
+    # Streaming commits all but the last second or so, so the tail is usually a few words
+    pairs = [
+        ("jarvis we need backup in the bone place second", "jarvis we need backup in the bone place second floor right now"),
+        ("jarvis get everyone to the fire dungeon third", "jarvis get everyone to the fire dungeon third floor"),
+        ("jarvis dungeon panic in the", "jarvis dungeon panic in the hive level two"),
+        ("jarvis tell the guild the corpse creek run", "jarvis tell the guild the corpse creek run starts in ten minutes"),
+        ("jarvis we are getting wrecked in aegis", "jarvis we are getting wrecked in aegis floor two"),
+        ("jarvis red alert in pulma", "jarvis red alert in pulma level three"),   # settled by the rules
+        ("jarvis help enemy at 1234", "jarvis help enemy at 1234 567"),           # settled by the rules
+    ]
+
+llm_cache.path = None   # never write the bench's answers to the real cache
+
+
+async def sequential(committed, final):
+    await asyncio.sleep(tail_ms / 1000)
+    return await detect_high_level_intent(final)
+
+
+async def speculative(committed, final):
+    speculation = speculate_intent(committed)
+    try:
+        await asyncio.sleep(tail_ms / 1000)
+        return await detect_high_level_intent(final, speculation)
+    finally:
+        if speculation:
+            speculation.task.cancel()
+
+
+async def measure(mode):
+    latency = RollingStats(window=len(pairs) * repeats)
+    trips = 0
+    for _ in range(repeats):
+        for committed, final in pairs:
+            llm_cache._entries.clear()
+            counter = llm_client.count_round_trips()
+            start = time.perf_counter()
+            await mode(committed, final)
+            latency.add((time.perf_counter() - start) * 1000)
+            trips += counter[0]
+    return latency, trips
+
+
+async def main():
+    await detect_high_level_intent("jarvis warm up the model please")   # first call loads the model
+    print(f"🏁 {len(pairs)} utterances x {repeats}, tail decode {tail_ms:.0f} ms")
+    for mode in (sequential, speculative):
+        latency, trips = await measure(mode)
+        print(f"{mode.__name__:<12}: {latency.summary()}  {trips} LLM round trip(s)")
+    print(f"🤖 {llm_client.summary()}")
+
+
+asyncio.run(main())
@@ -0,0 +1,92 @@
+"""Compare VocabularyIndex lookups with the per-call difflib scans they replaced.
+
+Runs every vocabulary lookup the bot makes on a transcript (intent keywords,
+wake-word aliases, mishearing autocorrect, dungeon aliases) over a corpus,
+checks both paths agree, and reports the time per transcript.
+
+Usage: python bench_vocab_index.py [transcripts.txt] [repeats]
+       (one transcript per line; a synthetic corpus is used if omitted)
+"""
+import difflib
+import random
+import re
+import sys
+import time
+
+from app.config import FLATTENED_DUNGEONS
+from app.transcribe.intent import INTENT_KEYWORDS, KEYWORD_INDEX
+from app.utils.dungeon import MISHEARING_INDEX, MISHEARING_LOOKUP
+from app.utils.jarvis import JARVIS_ALIASES, JARVIS_INDEX
+from app.utils.vocab_index import dungeon_index
+
+corpus_path = sys.argv[1] if len(sys.argv) > 1 else None
+repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+if corpus_path:
+    with open(corpus_path, encoding="utf-8") as f:
+        corpus = [line.strip() for line in f if line.strip()]
+else:
+    random.seed(7)
+    filler = "uh okay so we are going to go over there and then maybe like get the loot real quick".split()
+    commands = ["jarvis help enemy at 1234 567", "garvis ocean boss 2200 1400", "jarvis dungeon ossuary level 3",
+                "jervis red alert inferno second", "jarvis stop panic", "jarvis announce ocean farm happening in 10",
+                "jarvus kraul hive level 2", "charvis danger at dm third", "jarvis cancel event"]
+    corpus = [" ".join(random.sample(filler, random.randint(0, 8)) + [random.choice(commands)]) for _ in range(500)]
+
+if not corpus or repeats < 1:
+    sys.exit("❌ Need at least one transcript and one repeat")
+
+
+def words_of(text):
+    return re.findall(r"[a-zA-Z]+", text.lower())
+
+
+def difflib_path(text):
+    lowered = text.lower()
+    words = words_of(text)
+    intent = next((i for i, kws in INTENT_KEYWORDS.items() for k in kws
+                   if difflib.get_close_matches(k, lowered.split(), n=1, cutoff=0.8) or k in lowered), None)
+    jarvis = any(difflib.get_close_matches(w, JARVIS_ALIASES, n=1, cutoff=0.7) for w in words)
+    mishears = list(MISHEARING_LOOKUP.keys())
+    corrected = [(difflib.get_close_matches(w, mishears, n=1, cutoff=0.75) or [None])[0] for w in words]
+    aliases = list(FLATTENED_DUNGEONS.keys())
+    dungeon = (difflib.get_close_matches(" ".join(words), aliases, n=1, cutoff=0.75) or [None])[0]
+    per_word = [(difflib.get_close_matches(w, aliases, n=1, cutoff=0.8) or [None])[0] for w in words]
+    return intent, jarvis, corrected, dungeon, per_word
+
+
+def index_path(text):
+    lowered = text.lower()
+    words = words_of(text)
+    heard = {k for w in set(lowered.split()) for _, k in KEYWORD_INDEX.matches(w, 0.8, query_first=True)}
+    intent = next((i for i, kws in INTENT_KEYWORDS.items() for k in kws if k in heard or k in lowered), None)
+    jarvis = any(JARVIS_INDEX.best_match(w, 0.7) for w in words)
+    corrected = [MISHEARING_INDEX.best_match(w, 0.75) for w in words]
+    dungeon = dungeon_index.best_match(" ".join(words), 0.75)
+    per_word = [dungeon_index.best_match(w, 0.8) for w in words]
+    return intent, jarvis, corrected, dungeon, per_word
+
+
+mismatches = sum(difflib_path(t) != index_path(t) for t in corpus)
+
+
+def timed(fn, cold=False):
+    elapsed = 0.0
+    for _ in range(repeats):
+        if cold:
+            for index in (KEYWORD_INDEX, JARVIS_INDEX, MISHEARING_INDEX, dungeon_index):
+                index._memo.clear()
+        start = time.perf_counter()
+        for text in corpus:
+            fn(text)
+        elapsed += time.perf_counter() - start
+    return elapsed / (repeats * len(corpus)) * 1e6
+
+
+old_us = timed(difflib_path)
+cold_us = timed(index_path, cold=True)
+warm_us = timed(index_path)
+print(f"📚 {len(corpus)} transcripts x {repeats}, mismatches: {mismatches}")
+print(f"difflib      : {old_us:8.1f} µs per transcript")
+print(f"index (cold) : {cold_us:8.1f} µs per transcript ({old_us / cold_us:.1f}x), memo cleared every pass")
+print(f"index (warm) : {warm_us:8.1f} µs per transcript ({old_us / warm_us:.1f}x)")
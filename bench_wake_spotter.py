@@ -0,0 +1,68 @@
+"""Measure wake-word spotter recall and false alarms on recorded clips.
+
+Usage: python bench_wake_spotter.py <templates_dir> <positive_clips_dir> <negative_clips_dir> [max_false_alarms_per_hour]
+
+Positive clips contain "Jarvis" (or an alias), negative clips are ordinary
+table talk. Every clip is streamed through the spotter in 20 ms chunks, the
+same way live audio arrives, and the best match score is kept per clip.
+A negative clip that scores under the threshold counts as one false alarm,
+so false alarms per hour are a lower bound for long clips. The suggested
+threshold is the one with the best recall within the false-alarm budget;
+put it in WAKE_SPOTTER_THRESHOLD.
+"""
+import glob
+import os
+import sys
+import time
+
+import numpy as np
+from faster_whisper.audio import decode_audio
+
+from app.config import WAKE_SPOTTER_THRESHOLD
+from app.transcribe.wake_spotter import WakeWordSpotter
+
+templates_dir, positive_dir, negative_dir = sys.argv[1:4]
+max_false_alarms = float(sys.argv[4]) if len(sys.argv) > 4 else 1.0
+
+spotter = WakeWordSpotter(WAKE_SPOTTER_THRESHOLD)
+print(f"📚 {spotter.load_template_dir(templates_dir)} template(s) from {templates_dir}")
+
+
+def clip_scores(directory):
+    scores = []
+    audio_seconds = 0.0
+    started = time.perf_counter()
+    for i, path in enumerate(sorted(glob.glob(os.path.join(directory, "*.wav")))):
+        audio = decode_audio(path, sampling_rate=16000)
+        audio_seconds += len(audio) / 16000
+        speaker = f"{directory}:{i}"
+        for pos in range(0, len(audio), 320):
+            chunk = audio[pos:pos + 320]
+            spotter.feed(speaker, chunk, pos + len(chunk))
+        scores.append(spotter.min_score(speaker))
+        spotter.reset(speaker)
+    return np.array(scores), audio_seconds, time.perf_counter() - started
+
+
+pos_scores, pos_seconds, pos_time = clip_scores(positive_dir)
+neg_scores, neg_seconds, neg_time = clip_scores(negative_dir)
+print(f"🎧 {len(pos_scores)} positive / {len(neg_scores)} negative clips, "
+      f"{(pos_time + neg_time) / (pos_seconds + neg_seconds) * 1000:.1f} ms CPU per second of audio")
+
+negative_hours = neg_seconds / 3600
+print(" threshold   recall   false-alarm clips   false alarms/hour")
+suggested = None
+for threshold in np.arange(0.30, 0.85, 0.05):
+    recall = np.mean(pos_scores < threshold) if len(pos_scores) else 0.0
+    false_alarms = int(np.sum(neg_scores < threshold))
+    per_hour = false_alarms / negative_hours if negative_hours else 0.0
+    if per_hour <= max_false_alarms and (suggested is None or recall > suggested[1]):
+        suggested = (threshold, recall, per_hour)
+    marker = "  <- current" if abs(threshold - spotter.threshold) < 1e-6 else ""
+    print(f"   {threshold:.2f}     {recall:6.1%}   {false_alarms:>10d}          {per_hour:8.2f}{marker}")
+
+if suggested:
+    print(f"✅ Suggested WAKE_SPOTTER_THRESHOLD = {suggested[0]:.2f}: recall {suggested[1]:.1%}, "
+          f"{suggested[2]:.2f} false alarms/hour (budget {max_false_alarms:g})")
+else:
+    print(f"❌ No threshold stays within {max_false_alarms:g} false alarms/hour, record more templates")
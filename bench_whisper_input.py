@@ -0,0 +1,63 @@
+"""Compare Whisper latency for temp-WAV input vs. an in-memory float32 array.
+
+Usage: python bench_whisper_input.py [clip.wav] [model_size] [runs]
+"""
+import os
+import sys
+import tempfile
+import time
+import wave
+
+import numpy as np
+from faster_whisper import WhisperModel
+from faster_whisper.audio import decode_audio
+
+clip = sys.argv[1] if len(sys.argv) > 1 else None
+model_size = sys.argv[2] if len(sys.argv) > 2 else "base.en"
+runs = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+
+if clip:
+    audio = decode_audio(clip, sampling_rate=16000)
+else:
+    t = np.arange(16000 * 3) / 16000
+    audio = (0.1 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+model = WhisperModel(model_size, compute_type="int8")
+
+
+def via_temp_wav():
+    # The old path: write 16-bit WAV to disk, let faster-whisper decode it again
+    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as f:
+        pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16)
+        with wave.open(f.name, "wb") as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(16000)
+            wf.writeframes(pcm.tobytes())
+        segments, _ = model.transcribe(f.name, beam_size=1)
+        text = " ".join(s.text for s in segments)
+    os.remove(f.name)
+    return text
+
+
+def via_array():
+    segments, _ = model.transcribe(audio, beam_size=1)
+    return " ".join(s.text for s in segments)
+
+
+def timed(fn):
+    fn()  # warm-up
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return np.median(samples), np.percentile(samples, 95)
+
+
+print(f"🎧 {len(audio) / 16000:.1f}s clip, {model_size}, {runs} runs")
+wav_p50, wav_p95 = timed(via_temp_wav)
+arr_p50, arr_p95 = timed(via_array)
+print(f"temp WAV : p50 {wav_p50:7.1f} ms  p95 {wav_p95:7.1f} ms")
+print(f"ndarray  : p50 {arr_p50:7.1f} ms  p95 {arr_p95:7.1f} ms")
+print(f"saved    : {wav_p50 - arr_p50:7.1f} ms per call (p50)")
@@ -0,0 +1,50 @@
+"""Measure Whisper real-time factor (decode time / audio duration) per model size on CPU.
+
+RTF below 1.0 means a model keeps up with live speech on one worker. Use it
+to size CPU-only hosts: a host with N workers can serve roughly N / RTF
+concurrent speakers.
+
+Usage: python bench_whisper_rtf.py [clip.wav] [compute_type] [cpu_threads] [runs] [model_size ...]
+"""
+import sys
+import time
+
+import numpy as np
+from faster_whisper import WhisperModel
+from faster_whisper.audio import decode_audio
+
+clip = sys.argv[1] if len(sys.argv) > 1 and sys.argv[1] != "-" else None
+compute_type = sys.argv[2] if len(sys.argv) > 2 else "int8"
+cpu_threads = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+runs = int(sys.argv[4]) if len(sys.argv) > 4 else 5
+model_sizes = sys.argv[5:] or ["tiny.en", "base.en", "small.en"]
+
+if clip:
+    audio = decode_audio(clip, sampling_rate=16000)
+else:
+    t = np.arange(16000 * 5) / 16000
+    audio = (0.1 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+duration = len(audio) / 16000
+
+print(f"🎧 {duration:.1f}s clip, cpu {compute_type}, cpu_threads={cpu_threads or 'default'}, {runs} runs")
+print(f"{'model':<10} {'load s':>7} {'p50 ms':>8} {'p95 ms':>8} {'RTF':>6}")
+
+for model_size in model_sizes:
+    start = time.perf_counter()
+    model = WhisperModel(model_size, device="cpu", compute_type=compute_type, cpu_threads=cpu_threads)
+    load_seconds = time.perf_counter() - start
+
+    def decode():
+        segments, _ = model.transcribe(audio, beam_size=5)
+        return " ".join(s.text for s in segments)
+
+    decode()  # warm-up
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        decode()
+        samples.append((time.perf_counter() - start) * 1000)
+
+    p50, p95 = np.median(samples), np.percentile(samples, 95)
+    print(f"{model_size:<10} {load_seconds:7.1f} {p50:8.1f} {p95:8.1f} {p50 / 1000 / duration:6.2f}")
+    del model
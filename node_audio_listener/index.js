@@ -6,8 +6,10 @@ const {
   createAudioResource,
   entersState,
   AudioPlayerStatus,
+  StreamType,
   getVoiceConnection
 } = require("@discordjs/voice");
+const { Readable } = require("stream");
 const prism = require("prism-media");
 const WebSocket = require("ws");
 const fs = require("fs");
@@ -18,12 +20,24 @@ const GUILD_ID = process.env.GUILD_ID;
 const VC_CHANNEL_ID = process.env.VC_CHANNEL_ID;
 const WS_URL = process.env.WS_URL || "ws://localhost:8765";
 
+// Binary audio protocol (see app/shared/audio_protocol.py)
+const AUDIO_SUBPROTOCOL = "ggv-audio.v1";
+const PROTOCOL_VERSION = 1;
+const KIND_AUDIO = 1;
+const KIND_SPEAK = 2;
+const FORMAT_PCM_S16LE_48K_MONO = 1;
+const FORMAT_OGG_OPUS = 2;
+const MAX_FRAMES_PER_MESSAGE = 255;
+const FLUSH_INTERVAL_MS = 60; // ~3 Opus frames per speaker per message
+
 let ws;
 let reconnectAttempts = 0;
 const MAX_RECONNECT_ATTEMPTS = 100;
 const RECONNECT_INTERVAL = 5000;
 
 const activeStreams = new Map()
+const pendingFrames = [];
+const speakerSeq = new Map();
 
 const client = new Client({
   intents: [
@@ -57,8 +71,69 @@ async function shutdown() {
   }
 }
 
+function queueAudioFrame(username, chunk) {
+  const seq = speakerSeq.get(username) || 0;
+  speakerSeq.set(username, (seq + 1) >>> 0);
+  pendingFrames.push({ speaker: Buffer.from(username, "utf8"), seq, payload: chunk });
+  if (pendingFrames.length >= MAX_FRAMES_PER_MESSAGE) flushAudioFrames();
+}
+
+function flushAudioFrames() {
+  if (pendingFrames.length === 0) return;
+  const frames = pendingFrames.splice(0, MAX_FRAMES_PER_MESSAGE);
+  if (!ws || ws.readyState !== WebSocket.OPEN) return;
+
+  const parts = [Buffer.from([PROTOCOL_VERSION, KIND_AUDIO, FORMAT_PCM_S16LE_48K_MONO, frames.length])];
+  for (const { speaker, seq, payload } of frames) {
+    const header = Buffer.alloc(9);
+    header.writeUInt8(speaker.length, 0);
+    header.writeUInt32BE(seq, 1);
+    header.writeUInt32BE(payload.length, 5);
+    parts.push(header, speaker, payload);
+  }
+  ws.send(Buffer.concat(parts), { binary: true });
+}
+
+setInterval(flushAudioFrames, FLUSH_INTERVAL_MS);
+
+function decodeBinaryMessage(data) {
+  const version = data.readUInt8(0);
+  const kind = data.readUInt8(1);
+  const format = data.readUInt8(2);
+  const frameCount = data.readUInt8(3);
+  if (version !== PROTOCOL_VERSION) throw new Error(`unsupported protocol version ${version}`);
+
+  const frames = [];
+  let offset = 4;
+  for (let i = 0; i < frameCount; i++) {
+    const speakerLen = data.readUInt8(offset);
+    const seq = data.readUInt32BE(offset + 1);
+    const payloadLen = data.readUInt32BE(offset + 5);
+    offset += 9;
+    const speaker = data.toString("utf8", offset, offset + speakerLen);
+    offset += speakerLen;
+    frames.push({ speaker, seq, payload: data.subarray(offset, offset + payloadLen) });
+    offset += payloadLen;
+  }
+  return { kind, format, frames };
+}
+
+async function playReply(resource) {
+  const voiceConnection = getVoiceConnection(GUILD_ID);
+  if (!voiceConnection) {
+    console.warn("⚠️ No active voice connection to play audio");
+    return;
+  }
+
+  const player = createAudioPlayer();
+  voiceConnection.subscribe(player);
+  player.play(resource);
+
+  await entersState(player, AudioPlayerStatus.Playing, 5000);
+}
+
 function connectWebSocket() {
-  ws = new WebSocket(WS_URL);
+  ws = new WebSocket(WS_URL, [AUDIO_SUBPROTOCOL]);
 
   ws.on("open", () => {
     console.log(`🌐 Connected to WebSocket server at ${WS_URL}`);
@@ -80,8 +155,19 @@ function connectWebSocket() {
     }
   });
 
-  ws.on("message", async (data) => {
+  ws.on("message", async (data, isBinary) => {
     try {
+      if (isBinary) {
+        // 🔊 Opus replies are played straight from memory
+        const { kind, format, frames } = decodeBinaryMessage(data);
+        if (kind === KIND_SPEAK && format === FORMAT_OGG_OPUS) {
+          for (const { payload } of frames) {
+            await playReply(createAudioResource(Readable.from([payload]), { inputType: StreamType.OggOpus }));
+          }
+        }
+        return;
+      }
+
       const msg = JSON.parse(data);
 
       if (msg.type === "shutdown") {
@@ -93,20 +179,7 @@ function connectWebSocket() {
         const buffer = Buffer.from(msg.audio, "base64");
         const path = `jarvis_reply_${msg.user.replace(/[#]/g, "")}.wav`;
         fs.writeFileSync(path, buffer);
-
-        const player = createAudioPlayer();
-        const resource = createAudioResource(path);
-        const voiceConnection = getVoiceConnection(GUILD_ID);
-
-        if (!voiceConnection) {
-          console.warn("⚠️ No active voice connection to play audio");
-          return;
-        }
-
-        voiceConnection.subscribe(player);
-        player.play(resource);
-
-        await entersState(player, AudioPlayerStatus.Playing, 5000);
+        await playReply(createAudioResource(path));
       }
     } catch (err) {
       console.error(`❌ Failed to handle speak message: ${err.message}`);
@@ -157,10 +230,7 @@ client.once("ready", async () => {
   
       const onData = (chunk) => {
         if (ws && ws.readyState === WebSocket.OPEN) {
-          ws.send(JSON.stringify({
-            user: username,
-            audio: chunk.toString("base64"),
-          }));
+          queueAudioFrame(username, chunk);
         }
       };
   
@@ -0,0 +1,30 @@
+import asyncio
+
+from app.transcribe import transcriber
+from app.transcribe.cascade import escalation_reason
+from app.transcribe.whisper_modal import Transcript
+
+
+def test_near_miss_wake_word_is_handled(monkeypatch):
+    alerts = []
+
+    async def send_irc_message(message):
+        alerts.append(message)
+
+    monkeypatch.setattr(transcriber, "send_irc_message", send_irc_message)
+    text = "Jervis, red alert in Pulma level 3"
+
+    # The cascade accepts this on the fast tier, so check_command must act on it too
+    assert escalation_reason(Transcript(text, -0.2)) is None
+    success, speech_status = asyncio.run(transcriber.check_command(text, "tester"))
+
+    assert (success, speech_status) == (True, "silent")
+    assert alerts and "RED ALERT from tester" in alerts[0]
+
+
+def test_no_wake_word_is_ignored(monkeypatch):
+    async def send_irc_message(message):
+        raise AssertionError(f"nothing should be sent, got {message!r}")
+
+    monkeypatch.setattr(transcriber, "send_irc_message", send_irc_message)
+    assert asyncio.run(transcriber.check_command("red alert in Pulma level 3", "tester")) == (None, "silent")